@@ -1,12 +1,106 @@
 import html
+import json
+import os
 import re
-from . import tinycss
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from . import precompute, profiling, timing
+from .cache import CacheManager
+from .compare import compare_and_score
+from .fonts import build_context_index, context_key
+from .normalize import html_to_text
+from .persist import StyleStore
+from .prerender import PRERENDER_AHEAD, Prerenderer, typebox_field, upcoming_card_ids
 from aqt.reviewer import Reviewer
-from anki.utils import stripHTML
+from aqt.theme import theme_manager
 from aqt import gui_hooks
 from aqt import mw
 
 Reviewer.typeboxAnsPat = r"\[\[typebox:(.*?)\]\]"
+_TYPEBOX_RE = re.compile(Reviewer.typeboxAnsPat)
+
+# the add-on's caches share a memory limit, set by "cache_megabytes" in config.json
+CACHE_MEGABYTES = 32
+caches = CacheManager(maxbytes=CACHE_MEGABYTES * 1024 * 1024)
+
+# context font indexes of parsed note type stylesheets, keyed by (note type id, mod)
+_font_index_cache = caches.cache("font indexes", maxsize=64, note_type=lambda key: key[0])
+
+# where the add-on keeps its files; Anki leaves this folder alone on updates
+_USER_FILES = os.path.join(os.path.dirname(__file__), "user_files")
+
+# the same font indexes on disk, so restarts don't reparse unchanged stylesheets
+_style_store = StyleStore(os.path.join(_USER_FILES, "style_cache.sqlite"))
+
+# field name -> (ordinal, font, size) of note types, keyed by note type id
+_field_index_cache = caches.cache("field indexes", maxsize=64, note_type=lambda key: key)
+
+# (typeFont, typeSize, textarea html) of question typeboxes, see _question_key
+_question_cache = caches.cache("questions", maxsize=256, note_type=lambda key: key[0])
+
+# typebox html for each (template, font, size), see _typebox_html
+_template_cache = caches.cache("templates", maxsize=64)
+
+# normalized correct answers, keyed by (note id, note mod, field name)
+_correct_answer_cache = caches.cache("correct answers", maxsize=256)
+
+# id -> mod of the note types known to have typeboxes, from warming and from
+# reviews; upcoming cards of other note types aren't prerendered
+_typebox_note_types = {}
+
+# added to the reviewer page once per session, the cards only set the variables.
+# Plain class selectors: the note type's own .textbox-output rules come later in
+# the page, so they win at equal specificity and keep styling the answer box
+TYPEBOX_HEAD = """
+<style>
+.textbox-input {
+	font-family: var(--typebox-font);
+	font-size: var(--typebox-size);
+}
+.textbox-output {
+	white-space: pre-wrap;
+	font-family: var(--typebox-font, monospace);
+	font-size: var(--typebox-size);
+}
+</style>
+<script>
+function typeboxAns() {
+	if (window.event.keyCode == 13 && window.event.ctrlKey) pycmd("ans");
+}
+</script>
+"""
+
+# the typebox templates are filled with the html-escaped font and size
+TYPEBOX_INPUT = """
+<center>
+<textarea id=typeans class=textbox-input onkeypress="typeboxAns();" style="--typebox-font: '%s'; --typebox-size: %spx;"></textarea>
+</center>
+	"""
+
+# the answer side's wrapper, split around the <pre> that gets the comparison
+TYPEBOX_OUTPUT = (
+	"""
+<div class=textbox-output-parent style="%s%s">
+<pre class=textbox-output""",
+	"""
+</div>
+""",
+)
+
+# the ease buttons suggested by the similarity of typed answers: 3 (good) for
+# exact answers, 2 (hard) down to this similarity, 1 (again) below it
+HARD_SIMILARITY = 0.9
+
+# typed and correct answers longer than this together are compared on a worker
+# thread, and the comparison is put into the page when it's done
+ASYNC_COMPARE_CHARS = 20000
+
+# further typeboxes on the same card: only the first one is typed into the answer
+TYPEBOX_EXTRA_INPUT = """
+<center>
+<textarea class=textbox-input onkeypress="typeboxAns();" style="--typebox-font: '%s'; --typebox-size: %spx;"></textarea>
+</center>
+	"""
 
 
 def typeboxAnsFilter(self, buf: str) -> str:
@@ -16,7 +110,8 @@ def typeboxAnsFilter(self, buf: str) -> str:
 		self._typebox_note = False
 		typebox_replaced = self.typeboxAnsQuestionFilter(buf)
 
-		if typebox_replaced != buf:
+		# the question filter hands back buf itself when there's no typebox
+		if typebox_replaced is not buf:
 			self._typebox_note = True
 			return typebox_replaced
 
@@ -29,61 +124,259 @@ def typeboxAnsFilter(self, buf: str) -> str:
 	return self.typeAnsAnswerFilter(buf)
 
 
-def _set_font_details_from_card(reviewer, style, selector):
-	selector_rules = [r for r in style.rules if hasattr(r, "selector")]
-	card_style = next(
-		(r for r in selector_rules if "".join([t.value for t in r.selector]) == selector), None)
-	if card_style:
-		for declaration in card_style.declarations:
-			if declaration.name == "font-family":
-				reviewer.typeFont = "".join([t.value for t in declaration.value])
-			if declaration.name == "font-size":
-				reviewer.typeSize = "".join([str(t.value) for t in declaration.value])
+def _font_details(font_index, selector, font, size):
+	font_details = font_index.get(selector)
+	if font_details:
+		font = font_details.get("font-family", font)
+		size = font_details.get("font-size", size)
+	return font, size
+
+
+# the platform class Anki puts on the page, see fonts.PLATFORMS
+if sys.platform.startswith("win"):
+	_PLATFORM = "win"
+elif sys.platform == "darwin":
+	_PLATFORM = "mac"
+else:
+	_PLATFORM = "linux"
+
+
+def _context() -> str:
+	# night mode can be switched while Anki runs
+	return context_key(theme_manager.night_mode, _PLATFORM)
+
+
+def _font_index(model):
+	"""
+	Return the context font index of a note type's stylesheet, or None if it
+	has no css; see fonts.build_context_index. The css only changes when the
+	note type is edited, so it is parsed and indexed once and then kept in
+	memory and on disk. Edits bump the note type's mod, which keeps them from
+	serving a stale index from memory; on disk the index is keyed by a hash of
+	the css.
+	"""
+	css = model["css"]
+	if not css or not css.strip():
+		return None
+	# not the css itself: the cache would count every copy of it against its limit
+	key = (model["id"], model["mod"])
+	font_index = _font_index_cache.get(key)
+	if font_index is None:
+		font_index = _style_store.get(model["id"], css)
+		if font_index is None:
+			t = timing.clock()
+			# imported here rather than at load time: importing tinycss compiles
+			# all of its token regexes, which only cards with css need
+			from . import tinycss
+			parser = tinycss.make_parser("page3")
+			font_index = build_context_index(parser.parse_stylesheet(css))
+			timing.lap("css parse", t)
+			_style_store.put(model["id"], css, font_index)
+		_font_index_cache.set(key, font_index)
+	return font_index
+
+
+def _field_index(model):
+	"""
+	Return (fields, fallback) for a note type: fields maps each field name to
+	its (ordinal, font, size), fallback is the (font, size) used when the typebox
+	field is missing or empty. Rebuilt whenever the note type is modified.
+	"""
+	cached = _field_index_cache.get(model["id"])
+	if cached is not None and cached[0] == model["mod"]:
+		return cached[1]
+	fields = model["flds"]
+	index = {f["name"]: (f["ord"], f["font"], f["size"]) for f in fields}
+	maybe_answer_field = next((f for f in fields if f == "Back"), fields[-1])
+	fallback = (maybe_answer_field["font"], maybe_answer_field["size"])
+	_field_index_cache.set(model["id"], (model["mod"], (index, fallback)))
+	return index, fallback
+
+
+def _question_key(model, fld, has_answer):
+	# the mod covers the css, which is too big to keep in every key
+	return (model["id"], model["mod"], fld, has_answer, _context())
+
+
+def _typebox_html(template, font, size):
+	"""
+	Fill a typebox template in for a font and size. Fonts come from user css,
+	so they're escaped; many note types share a font, so the results are cached.
+	"""
+	key = (template, font, size)
+	rendered = _template_cache.get(key)
+	if rendered is None:
+		rendered = template % (html.escape(font), html.escape(str(size)))
+		_template_cache.set(key, rendered)
+	return rendered
+
+
+def _output_wrapper(font, size):
+	"""The answer side's (head, tail) around the comparison, like _typebox_html."""
+	key = (TYPEBOX_OUTPUT, font, size)
+	rendered = _template_cache.get(key)
+	if rendered is None:
+		font_family = "--typebox-font: '%s';" % html.escape(font) if font is not None else ""
+		font_size = " --typebox-size: %spx;" % html.escape(str(size)) if size is not None else ""
+		rendered = (TYPEBOX_OUTPUT[0] % (font_family, font_size), TYPEBOX_OUTPUT[1])
+		_template_cache.set(key, rendered)
+	return rendered
+
+
+def _render_question(model, fld, has_answer):
+	"""
+	Return (typeFont, typeSize, textarea html) for a typebox on field `fld` of
+	note type `model`; `has_answer` tells whether the note's field has a value.
+	Only depends on the note type, so it is cached and can be rendered ahead of
+	time on the prerender thread.
+	"""
+	key = _question_key(model, fld, has_answer)
+	rendered = _question_cache.get(key)
+	if rendered is not None:
+		return rendered
+	context = key[-1]
+	fields, fallback = _field_index(model)
+	field = fields.get(fld)
+	if field and has_answer:
+		font, size = field[1:]
+	else:
+		font, size = fallback
+
+	# ".card" styling should overwrite font/font size, as it does for the rest of the card
+	font_index = _font_index(model)
+	if font_index:
+		font_index = font_index[context]
+		font, size = _font_details(font_index, ".card", font, size)
+		font, size = _font_details(font_index, ".textbox-input", font, size)
+
+	rendered = (font, size, _typebox_html(TYPEBOX_INPUT, font, size))
+	_question_cache.set(key, rendered)
+	return rendered
+
+
+_prerenderer = Prerenderer(_render_question)
+
+
+def _replace_typeboxes(buf, matches, replacements):
+	"""Put replacements[i] in place of matches[i] of buf, in one pass."""
+	pieces = []
+	pos = 0
+	for m, replacement in zip(matches, replacements):
+		pieces.append(buf[pos : m.start()])
+		pieces.append(replacement)
+		pos = m.end()
+	pieces.append(buf[pos:])
+	return "".join(pieces)
 
 
 def typeboxAnsQuestionFilter(self, buf: str) -> str:
-	m = re.search(self.typeboxAnsPat, buf)
-	if not m:
+	if "[[typebox:" not in buf:
 		return buf
-	fld = m.group(1)
-	# loop through fields for a match
-	self.typeCorrect = None
-	fields = self.card.model()["flds"]
-	for f in fields:
-		if f["name"] == fld:
-			# get field value for correcting
-			self.typeCorrect = self.card.note()[f["name"]]
-			# get font/font size from field
-			self.typeFont = f["font"]
-			self.typeSize = f["size"]
-			break
-	if not self.typeCorrect:
-		maybe_answer_field = next((f for f in fields if f == "Back"), fields[-1])
-		self.typeFont = maybe_answer_field["font"]
-		self.typeSize = maybe_answer_field["size"]
+	t = timing.clock()
+	matches = list(_TYPEBOX_RE.finditer(buf))
+	t = timing.lap("question.regex", t)
+	if not matches:
+		return buf
+	model = self.card.model()
+	_typebox_note_types[model["id"]] = model["mod"]
+	note = self.card.note()
+	fields = _field_index(model)[0]
+	values = []
+	for m in matches:
+		field = fields.get(m.group(1))
+		values.append(note.fields[field[0]] if field else None)
+	# the first typebox is the one that gets compared with its field
+	fld = matches[0].group(1)
+	self.typeCorrect = values[0]
+	self._typebox_correct_key = (note.id, note.mod, fld)
+	t = timing.lap("question.field lookup", t)
+	self.typeFont, self.typeSize, typebox = _render_question(model, fld, bool(self.typeCorrect))
+	typeboxes = [typebox]
+	for m, value in zip(matches[1:], values[1:]):
+		font, size = _render_question(model, m.group(1), bool(value))[:2]
+		typeboxes.append(_typebox_html(TYPEBOX_EXTRA_INPUT, font, size))
+	t = timing.lap("question.font resolution", t)
+	buf = _replace_typeboxes(buf, matches, typeboxes)
+	timing.lap("question.html", t)
+	return buf
 
-	# ".card" styling should overwrite font/font size, as it does for the rest of the card
-	if self.card.model()["css"] and self.card.model()["css"].strip():
-		parser = tinycss.make_parser("page3")
-		parsed_style = parser.parse_stylesheet(self.card.model()["css"])
-		_set_font_details_from_card(self, parsed_style, ".card")
-		_set_font_details_from_card(self, parsed_style, ".textbox-input")
-
-	return re.sub(
-		self.typeboxAnsPat,
-		"""
-<center>
-<textarea id=typeans class=textbox-input onkeypress="typeboxAns();" style="font-family: '%s'; font-size: %spx;"></textarea>
-</center>
-<script>
-function typeboxAns() {
-	if (window.event.keyCode == 13 && window.event.ctrlKey) pycmd("ans");
-}
-</script>
+
+def _correct_text(reviewer):
 	"""
-		% (self.typeFont, self.typeSize),
-		buf,
-		)
+	The plain text of the card's correct answer. Notes reviewed again in the
+	same session (relearning, filtered decks) reuse it; editing a note bumps
+	its mod, which misses the cache.
+	"""
+	key = getattr(reviewer, "_typebox_correct_key", None)
+	cor = _correct_answer_cache.get(key) if key else None
+	if cor is None:
+		cor = html_to_text(reviewer.mw.col.media.strip(reviewer.typeCorrect))
+		if key:
+			_correct_answer_cache.set(key, cor)
+	return cor
+
+
+def suggestedEase(score: float) -> int:
+	"""The ease button a typed answer's similarity score suggests."""
+	if score >= 1:
+		return 3
+	return 2 if score >= HARD_SIMILARITY else 1
+
+
+def _score_html(score: float) -> str:
+	return "<div class=textbox-score data-ease=%d>%d%%</div>" % (suggestedEase(score), int(score * 100))
+
+
+_compare_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="typebox-compare")
+
+# bumped whenever a comparison is started or dropped; a finished comparison is
+# only shown if no other one came after it
+_compare_generation = 0
+_compare_future = None
+
+SHOW_COMPARISON = """
+(function() {
+	var outputs = document.querySelectorAll("pre.textbox-output[data-typebox-pending='%d']");
+	for (var i = 0; i < outputs.length; i++) {
+		outputs[i].innerHTML = %s;
+		outputs[i].removeAttribute("data-typebox-pending");
+		outputs[i].insertAdjacentHTML("afterend", %s);
+	}
+})();
+"""
+
+
+def _compare_later(reviewer, given, cor) -> int:
+	"""
+	Compare the answers on the worker thread, then put the result into the
+	placeholders tagged with the returned generation.
+	"""
+	global _compare_generation, _compare_future
+	cancelComparison()
+	generation = _compare_generation
+	future = _compare_executor.submit(compare_and_score, given, cor)
+	future.add_done_callback(lambda f: mw.taskman.run_on_main(lambda: _show_comparison(reviewer, generation, f)))
+	_compare_future = future
+	return generation
+
+
+def _show_comparison(reviewer, generation, future):
+	# runs on the main thread; the user may have moved on meanwhile
+	if future.cancelled() or generation != _compare_generation or reviewer.state != "answer":
+		return
+	res, reviewer.typeboxScore = future.result()
+	reviewer.web.eval(
+		SHOW_COMPARISON % (generation, json.dumps(res), json.dumps(_score_html(reviewer.typeboxScore)))
+	)
+
+
+def cancelComparison(*args):
+	"""Drop the comparison of the previous answer, if it's still running."""
+	global _compare_generation, _compare_future
+	if _compare_future is not None:
+		_compare_future.cancel()
+		_compare_future = None
+	_compare_generation += 1
 
 
 def typeboxAnsAnswerFilter(self, buf: str) -> str:
@@ -93,51 +386,55 @@ def typeboxAnsAnswerFilter(self, buf: str) -> str:
 
 	given = self.typedAnswer
 
+	t = timing.clock()
 	if self.typeCorrect:
 		# compare with typed answer
-		# before stripping anki's added html, add newline markers to preserve format
-		cor = self.mw.col.media.strip(self.typeCorrect)
-		newline_marker = "__typeboxnewline__"
-		cor = re.sub(r"(<div><br>|<br>)", newline_marker, cor)
-		cor = re.sub(r"(<div>)+", newline_marker, cor)
-		cor = re.sub(r"(\r\n|\n)", newline_marker, cor)
-		cor = stripHTML(cor)
-		cor = html.unescape(cor)
-		cor = cor.replace("\xa0", " ")
-		cor = cor.replace(newline_marker, "\n")
-		cor = cor.strip()
-		res = self.correct(given, cor, showBad=False)
+		cor = _correct_text(self)
+		t = timing.lap("answer.normalization", t)
+		pending = ""
+		if len(given) + len(cor) > ASYNC_COMPARE_CHARS:
+			# show what was typed until the comparison comes in
+			pending = " data-typebox-pending=%d" % _compare_later(self, given, cor)
+			res, self.typeboxScore, score = html.escape(given), None, ""
+		else:
+			res, self.typeboxScore = compare_and_score(given, cor)
+			score = _score_html(self.typeboxScore)
+		t = timing.lap("answer.comparison", t)
 	else:
 		res = self.typedAnswer
+		self.typeboxScore = None
+		score = pending = ""
 
 	# and update the type answer area
-	if self.card.model()["css"] and self.card.model()["css"].strip():
-		parser = tinycss.make_parser("page3")
-		parsed_style = parser.parse_stylesheet(self.card.model()["css"])
-		_set_font_details_from_card(self, parsed_style, ".textbox-output-parent")
-		_set_font_details_from_card(self, parsed_style, ".textbox-output")
-	font_family = "font-family: '%s';" % self.typeFont if hasattr(self, "typeFont") else ""
-	font_size = "font-size: %spx" % self.typeSize if hasattr(self, "typeSize") else ""
-	s = """
-<div class=textbox-output-parent>
-<style>
-pre {
-   white-space:pre-wrap;
-   %s%s 
-}
-</style>    
-<pre class=textbox-output>%s</pre>
-</div>
-""" % (
-		font_family,
-		font_size,
-		res,
-	)
-	if hadHR:
+	font, size = getattr(self, "typeFont", None), getattr(self, "typeSize", None)
+	font_index = _font_index(self.card.model())
+	if font_index:
+		font_index = font_index[_context()]
+		font, size = _font_details(font_index, ".textbox-output-parent", font, size)
+		font, size = _font_details(font_index, ".textbox-output", font, size)
+		self.typeFont, self.typeSize = font, size
+	t = timing.lap("answer.font resolution", t)
+	head, tail = _output_wrapper(font, size)
+	s = "".join((head, pending, ">", res, "</pre>", score, tail))
+	# every typebox on the card shows the comparison
+	matches = list(_TYPEBOX_RE.finditer(buf))
+	outputs = [s] * len(matches)
+	if hadHR and outputs:
 		# a hack to ensure the q/a separator falls before the answer
 		# comparison when user is using {{FrontSide}}
-		s = "<hr id=answer>" + s
-	return re.sub(self.typeboxAnsPat, s, buf)
+		outputs[0] = "<hr id=answer>" + s
+	buf = _replace_typeboxes(buf, matches, outputs)
+	timing.lap("answer.html", t)
+	return buf
+
+
+def injectTypeboxHead(web_content, context):
+	"""
+	Give the reviewer page the typebox script and stylesheet when it's set up,
+	instead of sending them along with every card.
+	"""
+	if isinstance(context, Reviewer):
+		web_content.head += TYPEBOX_HEAD
 
 
 def focusTypebox(card):
@@ -152,7 +449,117 @@ def focusTypebox(card):
         mw.web.setFocus()
 
 
-gui_hooks.reviewer_did_show_question.append(focusTypebox)
-Reviewer.typeAnsFilter = typeboxAnsFilter
+def prerenderUpcomingTypeboxes(card):
+	"""
+	Render the typeboxes of the next few cards on a background thread while
+	the user is busy with this one. Reading the cards and notes has to happen
+	here on the main thread; the stylesheet parsing and html are left to the
+	worker, whose results the question filter picks up from the cache.
+	"""
+	# nothing to do for collections without typeboxes; the question filter has
+	# already added the note type of the card being shown, if it has one
+	if not _typebox_note_types:
+		return
+	col = mw.col
+	for cid in upcoming_card_ids(col.sched, card.id, PRERENDER_AHEAD):
+		upcoming = col.getCard(cid)
+		model = upcoming.model()
+		if model["id"] not in _typebox_note_types:
+			continue
+		fld = typebox_field(upcoming.template()["qfmt"], Reviewer.typeboxAnsPat)
+		if fld is None:
+			continue
+		# usually both renderings are cached by warming; then the note isn't needed
+		keys = [_question_key(model, fld, has_answer) for has_answer in (True, False)]
+		if keys[0] in _question_cache and keys[1] in _question_cache:
+			continue
+		field = _field_index(model)[0].get(fld)
+		has_answer = bool(field and upcoming.note().fields[field[0]])
+		key = keys[0] if has_answer else keys[1]
+		if key in _question_cache:
+			continue
+		# the worker gets its own copy, the note type may be edited meanwhile
+		_prerenderer.submit(key, precompute.snapshot(model), fld, has_answer)
+
+
+def closeStyleStore():
+	_style_store.close()
+
+
+def applyConfig(config=None):
+	"""Apply the add-on's config.json; Anki calls this again when it's edited."""
+	if config is None:
+		config = mw.addonManager.getConfig(__name__) or {}
+	megabytes = config.get("cache_megabytes", CACHE_MEGABYTES)
+	caches.configure(int(megabytes * 1024 * 1024) if megabytes else None)
+	if config.get("profile_reviews"):
+		profiling.enable()
+	else:
+		profiling.disable()
+
+
+def dumpReviewProfile():
+	"""Save the profile of the review session that's ending, see profiling.py."""
+	return profiling.dump(os.path.join(_USER_FILES, "profiles"))
+
+
+_precompute_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="typebox-warm")
+
+
+def _warm(models):
+	models = [precompute.snapshot(m) for m in models]
+	return precompute.warm(
+		models, _render_question, Reviewer.typeboxAnsPat, _precompute_executor, _typebox_note_types
+	)
+
+
+def warmTypeboxCache(*args):
+	"""
+	Resolve the fonts and render the typeboxes of every note type that has
+	one, on a thread pool, so the first review of each deck doesn't pay for
+	parsing its stylesheet. Runs when a profile is opened and after a sync;
+	can also be called from the debug console.
+	"""
+	if mw.col is None:
+		return []
+	return _warm(mw.col.models.all())
+
+
+def noteTypesChanged(changes, handler=None):
+	"""
+	After an operation that changed note types, drop the cached entries of the
+	typebox note types that were edited or removed, and warm the edited ones
+	again. The changes don't say which note types were edited; their mod does.
+	"""
+	if not getattr(changes, "notetype", False) or mw.col is None:
+		return
+	edited = []
+	for mid, mod in list(_typebox_note_types.items()):
+		model = mw.col.models.get(mid)
+		if model is not None and model["mod"] == mod:
+			continue
+		caches.invalidate_note_type(mid)
+		del _typebox_note_types[mid]
+		if model is not None:
+			edited.append(model)
+	if edited:
+		_warm(edited)
+
+
+gui_hooks.webview_will_set_content.append(injectTypeboxHead)
+gui_hooks.reviewer_did_show_question.append(profiling.profiled(focusTypebox))
+gui_hooks.reviewer_did_show_question.append(profiling.profiled(prerenderUpcomingTypeboxes))
+gui_hooks.reviewer_did_show_question.append(profiling.profiled(cancelComparison))
+gui_hooks.reviewer_will_end.append(cancelComparison)
+gui_hooks.reviewer_will_end.append(dumpReviewProfile)
+gui_hooks.profile_did_open.append(warmTypeboxCache)
+gui_hooks.sync_did_finish.append(warmTypeboxCache)
+gui_hooks.profile_will_close.append(closeStyleStore)
+gui_hooks.profile_will_close.append(caches.clear)
+gui_hooks.profile_will_close.append(_typebox_note_types.clear)
+gui_hooks.operation_did_execute.append(noteTypesChanged)
+applyConfig()
+mw.addonManager.setConfigUpdatedAction(__name__, applyConfig)
+Reviewer.typeAnsFilter = profiling.profiled(typeboxAnsFilter)
 Reviewer.typeboxAnsQuestionFilter = typeboxAnsQuestionFilter
 Reviewer.typeboxAnsAnswerFilter = typeboxAnsAnswerFilter
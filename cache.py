@@ -0,0 +1,152 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def sizeof(value) -> int:
+	"""
+	Roughly how many bytes a cached value takes, counting the contents of
+	tuples, lists, sets and dicts but not objects shared with the rest of
+	Anki.
+	"""
+	size = sys.getsizeof(value)
+	if isinstance(value, (tuple, list, set, frozenset)):
+		size += sum(sizeof(item) for item in value)
+	elif isinstance(value, dict):
+		size += sum(sizeof(k) + sizeof(v) for k, v in value.items())
+	return size
+
+
+class LRUCache:
+	"""
+	A small mapping that keeps at most `maxsize` entries, and if `maxbytes` is
+	set at most that many bytes of keys and values, evicting the least
+	recently used entries when full. Safe to share with background threads.
+
+	Hits and misses of get() are counted, see stats().
+	"""
+
+	def __init__(self, maxsize: int = 128, maxbytes: int = None, name: str = None, manager=None):
+		self.name = name
+		self.maxsize = maxsize
+		self.maxbytes = maxbytes
+		self.hits = 0
+		self.misses = 0
+		self.bytes = 0
+		# key -> (value, size in bytes)
+		self._data = OrderedDict()
+		self._manager = manager
+		self._lock = manager._lock if manager is not None else threading.Lock()
+
+	def get(self, key, default=None):
+		with self._lock:
+			try:
+				value = self._data[key][0]
+			except KeyError:
+				self.misses += 1
+				return default
+			self.hits += 1
+			self._data.move_to_end(key)
+			return value
+
+	def set(self, key, value) -> None:
+		size = sizeof(key) + sizeof(value)
+		with self._lock:
+			old = self._data.pop(key, None)
+			if old is not None:
+				self.bytes -= old[1]
+			self._data[key] = (value, size)
+			self.bytes += size
+			while len(self._data) > self.maxsize or (
+				self.maxbytes is not None and self.bytes > self.maxbytes and len(self._data) > 1
+			):
+				self._pop_oldest()
+			if self._manager is not None:
+				self._manager._enforce()
+
+	def _pop_oldest(self) -> None:
+		size = self._data.popitem(last=False)[1][1]
+		self.bytes -= size
+
+	def discard_where(self, predicate) -> int:
+		"""Drop the entries whose key satisfies `predicate`; returns how many."""
+		with self._lock:
+			keys = [key for key in self._data if predicate(key)]
+			for key in keys:
+				self.bytes -= self._data.pop(key)[1]
+			return len(keys)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+			self.bytes = 0
+
+	def stats(self) -> dict:
+		return {"entries": len(self._data), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
+
+	def __contains__(self, key) -> bool:
+		return key in self._data
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+
+class CacheManager:
+	"""
+	Owns the add-on's caches and keeps them, together, under `maxbytes`: when
+	they go over, the biggest cache gives up its least recently used entries
+	first.
+
+	Caches made with a `note_type` function, which maps a key to the id of the
+	note type it belongs to, are emptied of that note type's entries by
+	invalidate_note_type().
+	"""
+
+	def __init__(self, maxbytes: int = None):
+		self.maxbytes = maxbytes
+		self._caches = {}
+		self._note_type_keys = {}
+		self._lock = threading.RLock()
+
+	def cache(self, name: str, maxsize: int = 128, note_type=None) -> LRUCache:
+		cache = LRUCache(maxsize=maxsize, name=name, manager=self)
+		self._caches[name] = cache
+		if note_type is not None:
+			self._note_type_keys[name] = note_type
+		return cache
+
+	@property
+	def bytes(self) -> int:
+		return sum(cache.bytes for cache in self._caches.values())
+
+	def configure(self, maxbytes: int = None) -> None:
+		with self._lock:
+			self.maxbytes = maxbytes
+			self._enforce()
+
+	def _enforce(self) -> None:
+		if self.maxbytes is None:
+			return
+		while self.bytes > self.maxbytes:
+			biggest = max(self._caches.values(), key=lambda cache: cache.bytes)
+			if not biggest._data:
+				break
+			biggest._pop_oldest()
+
+	def invalidate_note_type(self, mid) -> int:
+		"""Drop every cached entry of note type `mid`; returns how many."""
+		with self._lock:
+			return sum(
+				self._caches[name].discard_where(lambda key: note_type(key) == mid)
+				for name, note_type in self._note_type_keys.items()
+			)
+
+	def clear(self) -> None:
+		with self._lock:
+			for cache in self._caches.values():
+				cache.clear()
+
+	def stats(self) -> dict:
+		"""Map each cache's name to its entries, bytes, hits and misses."""
+		with self._lock:
+			return {name: cache.stats() for name, cache in self._caches.items()}
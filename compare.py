@@ -0,0 +1,449 @@
+import html
+import unicodedata
+from bisect import bisect_left
+
+# answers longer than this (typed and correct together) aren't diffed by
+# character; the differing middle is marked as a whole
+MAX_DIFF_CHARS = 200000
+
+# upper bound on the edit distance the diff searches for. The search costs
+# about O(D^2) steps on top of following matching runs, so this keeps a
+# badly mistyped essay from stalling the reviewer
+MAX_EDITS = 1000
+
+# how typed answers are aligned with the correct one: "char" diffs the whole
+# answer by character, "line" anchors matching lines first and only diffs the
+# lines in between by character, "auto" picks "line" for multi-line answers
+COMPARISON_MODE = "auto"
+
+# the edit distance of answers is computed exactly while the differing middles
+# of the two fit in this many DP cells, about 25ms for two 4000 character
+# middles; bigger ones are scored hunk by hunk along the diff's alignment instead
+MAX_DISTANCE_CELLS = 1 << 24
+
+
+def _common_prefix(a, b, a_lo, a_hi, b_lo, b_hi) -> int:
+	n = min(a_hi - a_lo, b_hi - b_lo)
+	if not n or a[a_lo] != b[b_lo]:
+		return 0
+	# binary search on slice equality, which compares in C
+	lo, hi = 1, n
+	while lo < hi:
+		mid = (lo + hi + 1) // 2
+		if a[a_lo:a_lo + mid] == b[b_lo:b_lo + mid]:
+			lo = mid
+		else:
+			hi = mid - 1
+	return lo
+
+
+def _common_suffix(a, b, a_lo, a_hi, b_lo, b_hi) -> int:
+	n = min(a_hi - a_lo, b_hi - b_lo)
+	if not n or a[a_hi - 1] != b[b_hi - 1]:
+		return 0
+	lo, hi = 1, n
+	while lo < hi:
+		mid = (lo + hi + 1) // 2
+		if a[a_hi - mid:a_hi] == b[b_hi - mid:b_hi]:
+			lo = mid
+		else:
+			hi = mid - 1
+	return lo
+
+
+def _middle_snake(a, b, a_lo, a_hi, b_lo, b_hi, max_d):
+	"""
+	Find the middle snake of an optimal edit script between a[a_lo:a_hi] and
+	b[b_lo:b_hi] (Myers 1986, section 4b), searching from both ends at once.
+
+	Returns (x, y, u, v): the snake runs from (x, y) to (u, v) in absolute
+	indices, all of it matching. Returns None if the edit distance is above
+	max_d.
+	"""
+	n = a_hi - a_lo
+	m = b_hi - b_lo
+	delta = n - m
+	odd = delta & 1
+	offset = n + m + 1
+	# furthest reaching x per diagonal, forward and in reversed coordinates
+	vf = [0] * (2 * offset + 1)
+	vb = [0] * (2 * offset + 1)
+	for d in range(min((n + m + 1) // 2, (max_d + 1) // 2) + 1):
+		for k in range(-d, d + 1, 2):
+			if k == -d or (k != d and vf[offset + k - 1] < vf[offset + k + 1]):
+				x = vf[offset + k + 1]
+			else:
+				x = vf[offset + k - 1] + 1
+			y = x - k
+			x0, y0 = x, y
+			while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+				x += 1
+				y += 1
+			vf[offset + k] = x
+			kr = delta - k
+			if odd and -(d - 1) <= kr <= d - 1 and x + vb[offset + kr] >= n:
+				return a_lo + x0, b_lo + y0, a_lo + x, b_lo + y
+		for kr in range(-d, d + 1, 2):
+			if kr == -d or (kr != d and vb[offset + kr - 1] < vb[offset + kr + 1]):
+				xr = vb[offset + kr + 1]
+			else:
+				xr = vb[offset + kr - 1] + 1
+			yr = xr - kr
+			xr0, yr0 = xr, yr
+			while xr < n and yr < m and a[a_hi - xr - 1] == b[b_hi - yr - 1]:
+				xr += 1
+				yr += 1
+			vb[offset + kr] = xr
+			k = delta - kr
+			if not odd and -d <= k <= d and xr + vf[offset + k] >= n:
+				return a_hi - xr, b_hi - yr, a_hi - xr0, b_hi - yr0
+	return None
+
+
+def _diff(a, b, a_lo, a_hi, b_lo, b_hi, blocks, max_d) -> bool:
+	prefix = _common_prefix(a, b, a_lo, a_hi, b_lo, b_hi)
+	if prefix:
+		blocks.append((a_lo, b_lo, prefix))
+		a_lo += prefix
+		b_lo += prefix
+	suffix = _common_suffix(a, b, a_lo, a_hi, b_lo, b_hi)
+	a_hi -= suffix
+	b_hi -= suffix
+	if a_lo < a_hi and b_lo < b_hi:
+		snake = _middle_snake(a, b, a_lo, a_hi, b_lo, b_hi, max_d)
+		if snake is None:
+			return False
+		x, y, u, v = snake
+		_diff(a, b, a_lo, x, b_lo, y, blocks, max_d)
+		if u > x:
+			blocks.append((x, y, u - x))
+		_diff(a, b, u, a_hi, v, b_hi, blocks, max_d)
+	if suffix:
+		blocks.append((a_hi, b_hi, suffix))
+	return True
+
+
+def _merge_blocks(blocks) -> list:
+	blocks.sort()
+	# merge blocks that touch, as the recursion can split a run of matches
+	merged = []
+	for i, j, n in blocks:
+		if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+			merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + n)
+		else:
+			merged.append((i, j, n))
+	return merged
+
+
+def matching_blocks(a, b, max_edits=MAX_EDITS) -> list:
+	"""
+	Return the matching blocks of a shortest edit script between sequences a
+	and b, as (i, j, n) triples like difflib.SequenceMatcher.get_matching_blocks
+	without its terminating dummy. Uses Myers' O(ND) diff in linear space.
+
+	If a and b are more than max_edits edits apart, only their common prefix
+	and suffix are reported.
+	"""
+	blocks = []
+	if not _diff(a, b, 0, len(a), 0, len(b), blocks, max_edits):
+		blocks = []
+		prefix = _common_prefix(a, b, 0, len(a), 0, len(b))
+		suffix = _common_suffix(a, b, prefix, len(a), prefix, len(b))
+		if prefix:
+			blocks.append((0, 0, prefix))
+		if suffix:
+			blocks.append((len(a) - suffix, len(b) - suffix, suffix))
+	return _merge_blocks(blocks)
+
+
+def _blocks_within(a, b, budget) -> list:
+	"""
+	matching_blocks within the edits left in budget[0], taking the edits the
+	script uses off it. Diffs that run out use up the rest of the budget, so
+	the hunks of one comparison together never search past the limit.
+	"""
+	blocks = matching_blocks(a, b, budget[0])
+	edits = len(a) + len(b) - 2 * sum(n for _, _, n in blocks)
+	budget[0] = max(budget[0] - edits, 0)
+	return blocks
+
+
+def _split_lines(text: str) -> list:
+	lines = text.split("\n")
+	for i in range(len(lines) - 1):
+		lines[i] += "\n"
+	if not lines[-1]:
+		lines.pop()
+	return lines
+
+
+def _unique_line_anchors(a, b, a_lo, a_hi, b_lo, b_hi) -> list:
+	"""
+	Pair up the lines that occur exactly once in both a[a_lo:a_hi] and
+	b[b_lo:b_hi], keeping the longest run of pairs that appear in the same
+	order in both (patience diff).
+	"""
+	# line -> its index, or -1 once it turns out not to be unique
+	a_seen = {}
+	for i in range(a_lo, a_hi):
+		line = a[i]
+		a_seen[line] = -1 if line in a_seen else i
+	b_seen = {}
+	for j in range(b_lo, b_hi):
+		line = b[j]
+		if line in a_seen:
+			b_seen[line] = -1 if line in b_seen else j
+	pairs = sorted(
+		(a_seen[line], j) for line, j in b_seen.items() if j != -1 and a_seen[line] != -1
+	)
+	# longest increasing subsequence of b positions, in a order
+	tails = []
+	tail_indexes = []
+	previous = []
+	for index, (i, j) in enumerate(pairs):
+		pos = bisect_left(tails, j)
+		if pos == len(tails):
+			tails.append(j)
+			tail_indexes.append(index)
+		else:
+			tails[pos] = j
+			tail_indexes[pos] = index
+		previous.append(tail_indexes[pos - 1] if pos else -1)
+	anchors = []
+	index = tail_indexes[-1] if tail_indexes else -1
+	while index != -1:
+		anchors.append(pairs[index])
+		index = previous[index]
+	anchors.reverse()
+	return anchors
+
+
+def _patience_diff(a, b, a_lo, a_hi, b_lo, b_hi, blocks, budget) -> None:
+	while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+		blocks.append((a_lo, b_lo, 1))
+		a_lo += 1
+		b_lo += 1
+	tail = 0
+	while a_hi - tail > a_lo and b_hi - tail > b_lo and a[a_hi - tail - 1] == b[b_hi - tail - 1]:
+		tail += 1
+	if tail:
+		blocks.append((a_hi - tail, b_hi - tail, tail))
+		a_hi -= tail
+		b_hi -= tail
+	if a_lo == a_hi or b_lo == b_hi:
+		return
+	anchors = _unique_line_anchors(a, b, a_lo, a_hi, b_lo, b_hi)
+	if not anchors:
+		# no unique lines to anchor on, align this stretch with a plain diff
+		for i, j, n in _blocks_within(a[a_lo:a_hi], b[b_lo:b_hi], budget):
+			blocks.append((a_lo + i, b_lo + j, n))
+		return
+	for i, j in anchors:
+		_patience_diff(a, b, a_lo, i, b_lo, j, blocks, budget)
+		blocks.append((i, j, 1))
+		a_lo, b_lo = i + 1, j + 1
+	_patience_diff(a, b, a_lo, a_hi, b_lo, b_hi, blocks, budget)
+
+
+def line_matching_blocks(a: str, b: str, max_edits=MAX_EDITS) -> list:
+	"""
+	Like matching_blocks, but for multi-line text: matching lines are found
+	first with a patience diff, and only the lines between them are diffed by
+	character. Returns character blocks.
+
+	The character diffs share one budget of max_edits edits, as one diff of
+	the whole answer would; once it's used up, the remaining hunks only keep
+	their common prefix and suffix. The line diffs share another one.
+	"""
+	a_lines = _split_lines(a)
+	b_lines = _split_lines(b)
+	line_blocks = []
+	_patience_diff(a_lines, b_lines, 0, len(a_lines), 0, len(b_lines), line_blocks, [max_edits])
+	line_blocks.sort()
+	a_offsets = [0]
+	for line in a_lines:
+		a_offsets.append(a_offsets[-1] + len(line))
+	b_offsets = [0]
+	for line in b_lines:
+		b_offsets.append(b_offsets[-1] + len(line))
+
+	blocks = []
+	budget = [max_edits]
+	a_line = b_line = 0
+	# a dummy block at the end closes the last hunk
+	for i, j, n in line_blocks + [(len(a_lines), len(b_lines), 0)]:
+		if i > a_line and j > b_line:
+			a_lo, b_lo = a_offsets[a_line], b_offsets[b_line]
+			hunk = _blocks_within(a[a_lo:a_offsets[i]], b[b_lo:b_offsets[j]], budget)
+			for x, y, cnt in hunk:
+				blocks.append((a_lo + x, b_lo + y, cnt))
+		if n:
+			blocks.append((a_offsets[i], b_offsets[j], a_offsets[i + n] - a_offsets[i]))
+		a_line, b_line = i + n, j + n
+	return _merge_blocks(blocks)
+
+
+def comparison_blocks(given: str, correct: str, mode=None) -> list:
+	"""The matching blocks the typed answer is marked up with, see COMPARISON_MODE."""
+	if len(given) + len(correct) > MAX_DIFF_CHARS:
+		max_edits = 0
+	else:
+		max_edits = MAX_EDITS
+	mode = mode or COMPARISON_MODE
+	if mode == "auto":
+		mode = "line" if "\n" in given or "\n" in correct else "char"
+	if mode == "line":
+		return line_matching_blocks(given, correct, max_edits)
+	return matching_blocks(given, correct, max_edits)
+
+
+def tokenize_comparison(given: str, correct: str, blocks=None, mode=None):
+	"""
+	Split the typed and correct answers into (ok, text) runs, the way Anki's
+	Reviewer.tokenizeComparison does.
+	"""
+	if blocks is None:
+		blocks = comparison_blocks(given, correct, mode)
+	givenElems = []
+	correctElems = []
+	givenPoint = 0
+	correctPoint = 0
+	for x, y, cnt in blocks:
+		# if anything was missed/extra, log it
+		if givenPoint != x:
+			givenElems.append((False, given[givenPoint:x]))
+		if correctPoint != y:
+			correctElems.append((False, correct[correctPoint:y]))
+		givenPoint = x + cnt
+		correctPoint = y + cnt
+		# log the match
+		if cnt:
+			givenElems.append((True, given[x:givenPoint]))
+			correctElems.append((True, correct[y:correctPoint]))
+	if givenPoint != len(given):
+		givenElems.append((False, given[givenPoint:]))
+	if correctPoint != len(correct):
+		correctElems.append((False, correct[correctPoint:]))
+	return givenElems, correctElems
+
+
+def _good(s: str) -> str:
+	return "<span class=typeGood>" + html.escape(s) + "</span>"
+
+
+def _bad(s: str) -> str:
+	return "<span class=typeBad>" + html.escape(s) + "</span>"
+
+
+def _missed(s: str) -> str:
+	return "<span class=typeMissed>" + html.escape(s) + "</span>"
+
+
+def render_comparison(givenElems, correctElems) -> str:
+	res = []
+	for ok, txt in givenElems:
+		res.append(_good(txt) if ok else _bad(txt))
+	res.append("<br><span id=typearrow>&darr;</span><br>")
+	for ok, txt in correctElems:
+		res.append(_good(txt) if ok else _missed(txt))
+	return "".join(res)
+
+
+def _levenshtein(a, b) -> int:
+	"""
+	Levenshtein distance by Myers' bit-parallel algorithm, in Hyyrö's
+	formulation: one column of the DP matrix is kept as vertical delta bit
+	vectors over a, held in Python ints, so each character of b costs a
+	handful of big-int operations instead of len(a) cell updates.
+	"""
+	if len(a) > len(b):
+		a, b = b, a
+	m = len(a)
+	if not m:
+		return len(b)
+	peq = {}
+	for i, c in enumerate(a):
+		peq[c] = peq.get(c, 0) | (1 << i)
+	full = (1 << m) - 1
+	last = 1 << (m - 1)
+	pv = full
+	mv = 0
+	distance = m
+	for c in b:
+		eq = peq.get(c, 0)
+		xv = eq | mv
+		xh = (((eq & pv) + pv) ^ pv) | eq
+		ph = mv | ~(xh | pv)
+		mh = pv & xh
+		if ph & last:
+			distance += 1
+		elif mh & last:
+			distance -= 1
+		ph = (ph << 1) | 1
+		mh <<= 1
+		pv = (mh | ~(xv | ph)) & full
+		mv = ph & xv
+	return distance
+
+
+def _gap_distance(a, b, a_lo, a_hi, b_lo, b_hi) -> int:
+	if (a_hi - a_lo) * (b_hi - b_lo) > MAX_DISTANCE_CELLS:
+		# an upper bound: substitute the overlap, insert or delete the rest
+		return max(a_hi - a_lo, b_hi - b_lo)
+	return _levenshtein(a[a_lo:a_hi], b[b_lo:b_hi])
+
+
+def edit_distance(a: str, b: str, blocks=None) -> int:
+	"""
+	The Levenshtein distance between a and b. When their differing middle is
+	too big to compute exactly, the distance of each gap between the matching
+	`blocks` of a diff of a and b is summed instead, which keeps the work to a
+	band around the diff's alignment; the result is then an upper bound, never
+	more than the length of the longer answer.
+	"""
+	prefix = _common_prefix(a, b, 0, len(a), 0, len(b))
+	suffix = _common_suffix(a, b, prefix, len(a), prefix, len(b))
+	a_hi, b_hi = len(a) - suffix, len(b) - suffix
+	if (a_hi - prefix) * (b_hi - prefix) <= MAX_DISTANCE_CELLS:
+		return _levenshtein(a[prefix:a_hi], b[prefix:b_hi])
+	if blocks is None:
+		blocks = matching_blocks(a, b)
+	distance = 0
+	a_lo = b_lo = 0
+	for i, j, n in blocks + [(len(a), len(b), 0)]:
+		distance += _gap_distance(a, b, a_lo, i, b_lo, j)
+		a_lo, b_lo = i + n, j + n
+	# substituting the shorter answer and inserting the rest is always possible
+	return min(distance, max(len(a), len(b)))
+
+
+def similarity(given: str, correct: str, blocks=None) -> float:
+	"""How close the typed answer is to the correct one, from 0 to 1."""
+	longest = max(len(given), len(correct))
+	if not longest:
+		return 1.0
+	return 1 - edit_distance(given, correct, blocks) / longest
+
+
+def compare_and_score(given: str, correct: str, mode=None):
+	"""
+	Diff-correct the typed answer against the correct one, producing the same
+	markup as Anki's Reviewer.correct. Returns the markup and the similarity
+	of the answers, which reuses the diff's matching blocks.
+	"""
+	if given == correct:
+		return "<div><code id=typeans>" + _good(given) + "</code></div>", 1.0
+	# compare in NFC form so accents appear correct
+	given = unicodedata.normalize("NFC", given)
+	correct = unicodedata.normalize("NFC", correct)
+	blocks = comparison_blocks(given, correct, mode)
+	res = render_comparison(*tokenize_comparison(given, correct, blocks))
+	return "<div><code id=typeans>" + res + "</code></div>", similarity(given, correct, blocks)
+
+
+def compare(given: str, correct: str, mode=None) -> str:
+	"""
+	Diff-correct the typed answer against the correct one, producing the same
+	markup as Anki's Reviewer.correct.
+	"""
+	return compare_and_score(given, correct, mode)[0]
@@ -0,0 +1,138 @@
+import re
+
+FONT_PROPERTIES = ("font-family", "font-size")
+
+# the selectors whose fonts the typeboxes use
+TARGETS = (".card", ".textbox-input", ".textbox-output-parent", ".textbox-output")
+
+# classes Anki puts on the page depending on where the card is shown; other
+# names that mean the same are mapped to these
+PLATFORMS = ("win", "mac", "linux")
+CONTEXT_ALIASES = {"night_mode": "nightMode", "isWin": "win", "isMac": "mac", "isLin": "linux"}
+CONTEXT_CLASSES = frozenset(("nightMode", "mobile") + PLATFORMS)
+
+# the card itself is always there for descendant selectors like `.card .textbox-input`
+AMBIENT_CLASSES = frozenset(("card",))
+
+_COMPOUND_RE = re.compile(r"(html|body)?((?:\.-?[A-Za-z_][\w-]*)*)")
+
+
+def _token_text(t) -> str:
+	return t.as_css() if t.is_container else str(t.value)
+
+
+def _split_selector_group(selector):
+	"""Split a selector token list on top-level commas, normalizing whitespace."""
+	selectors = []
+	current = []
+	for t in selector:
+		if t.type == "DELIM" and t.value == ",":
+			selectors.append("".join(current).strip())
+			current = []
+		elif t.type == "S":
+			current.append(" ")
+		else:
+			current.append(_token_text(t))
+	selectors.append("".join(current).strip())
+	return [s for s in selectors if s]
+
+
+def _declaration_value(declaration):
+	return "".join([_token_text(t) for t in declaration.value])
+
+
+def font_rules(style):
+	"""
+	Yield (selector, font details) for the rules of a parsed stylesheet that
+	set font properties, in stylesheet order. Selector lists like
+	`.card, .textbox-input` are split so each selector comes on its own.
+	"""
+	for rule in style.rules:
+		# only plain rulesets; @media and @page rules carry no usable selector
+		if rule.at_keyword is not None:
+			continue
+		font_details = {}
+		for declaration in rule.declarations:
+			if declaration.name in FONT_PROPERTIES:
+				font_details[declaration.name] = _declaration_value(declaration)
+		if not font_details:
+			continue
+		for selector in _split_selector_group(rule.selector):
+			yield selector, font_details
+
+
+def context_key(night_mode: bool, platform: str, mobile: bool = False) -> str:
+	"""The key of a context in a context index, e.g. "mac nightMode"."""
+	classes = [platform]
+	if night_mode:
+		classes.append("nightMode")
+	if mobile:
+		classes.append("mobile")
+	return " ".join(sorted(classes))
+
+
+def contexts():
+	"""Yield (key, classes) for every combination of context classes."""
+	for night_mode in (False, True):
+		for platform in PLATFORMS:
+			for mobile in (False, True):
+				key = context_key(night_mode, platform, mobile)
+				yield key, frozenset(key.split())
+
+
+def _parse_selector(selector):
+	"""
+	Return (target, context classes, specificity) for a selector that styles
+	one of the TARGETS depending only on context classes, e.g.
+	`.nightMode .card` or `body.mac .textbox-input`, or None for any other
+	selector.
+	"""
+	required = set()
+	specificity = [0, 0]
+	target = None
+	compounds = selector.split(" ")
+	for i, compound in enumerate(compounds):
+		m = _COMPOUND_RE.fullmatch(compound)
+		if not compound or not m:
+			return None
+		if m.group(1):
+			specificity[1] += 1
+		for name in m.group(2).split(".")[1:]:
+			specificity[0] += 1
+			name = CONTEXT_ALIASES.get(name, name)
+			if i == len(compounds) - 1 and target is None and "." + name in TARGETS:
+				target = "." + name
+			elif name in CONTEXT_CLASSES:
+				required.add(name)
+			elif name not in AMBIENT_CLASSES:
+				return None
+	if target is None:
+		return None
+	return target, frozenset(required), tuple(specificity)
+
+
+def build_context_index(style) -> dict:
+	"""
+	Resolve the fonts of each of the TARGETS for every combination of the
+	context classes Anki adds to the page (night mode, platform, mobile), so
+	the filters can look them up directly for the context they run in.
+
+	Returns {context key: {target: font details}}. As in the browser, more
+	specific selectors win over less specific ones, and later rules over
+	earlier ones of the same specificity, property by property.
+	"""
+	entries = []
+	for order, (selector, font_details) in enumerate(font_rules(style)):
+		parsed = _parse_selector(selector)
+		if parsed is not None:
+			target, required, specificity = parsed
+			entries.append((specificity, order, target, required, font_details))
+	entries.sort(key=lambda entry: entry[:2])
+	index = {}
+	for key, classes in contexts():
+		resolved = {}
+		for _, _, target, required, font_details in entries:
+			if required <= classes:
+				resolved.setdefault(target, {}).update(font_details)
+		index[key] = resolved
+	return index
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+# bump when the shape of stored font indexes changes; older files are cleared
+SCHEMA_VERSION = 2
+
+
+def css_hash(css: str) -> str:
+	return hashlib.sha1(css.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class StyleStore:
+	"""
+	Font indexes of note type stylesheets, kept in a small SQLite file so they
+	survive restarts. Entries are keyed by note type id and a hash of its css,
+	one per note type.
+
+	The file is only a cache: if it can't be opened or turns out to be corrupt
+	it is deleted and recreated, and if that fails too the store quietly turns
+	itself off.
+	"""
+
+	def __init__(self, path: str):
+		self.path = path
+		self._db = None
+		self._disabled = False
+		self._lock = threading.Lock()
+
+	def _open(self):
+		os.makedirs(os.path.dirname(self.path), exist_ok=True)
+		db = sqlite3.connect(self.path, check_same_thread=False)
+		try:
+			if db.execute("pragma user_version").fetchone()[0] != SCHEMA_VERSION:
+				db.execute("drop table if exists font_index")
+				db.execute("pragma user_version = %d" % SCHEMA_VERSION)
+			db.execute(
+				"create table if not exists font_index"
+				" (mid integer primary key, css_hash text not null, font_index text not null)"
+			)
+			db.commit()
+		except sqlite3.DatabaseError:
+			db.close()
+			raise
+		return db
+
+	def _connection(self):
+		if self._db is None and not self._disabled:
+			try:
+				self._db = self._open()
+			except (OSError, sqlite3.DatabaseError):
+				self._reset()
+		return self._db
+
+	def _reset(self):
+		"""Throw away a broken cache file and start over, or give up."""
+		if self._db is not None:
+			self._db.close()
+			self._db = None
+		try:
+			if os.path.exists(self.path):
+				os.remove(self.path)
+			self._db = self._open()
+		except (OSError, sqlite3.DatabaseError):
+			self._disabled = True
+
+	def get(self, mid, css: str):
+		"""The stored font index for this note type and css, or None."""
+		with self._lock:
+			db = self._connection()
+			if db is None:
+				return None
+			try:
+				row = db.execute(
+					"select font_index from font_index where mid = ? and css_hash = ?", (mid, css_hash(css))
+				).fetchone()
+				return json.loads(row[0]) if row else None
+			except (sqlite3.DatabaseError, ValueError):
+				self._reset()
+				return None
+
+	def put(self, mid, css: str, font_index: dict) -> None:
+		with self._lock:
+			db = self._connection()
+			if db is None:
+				return
+			try:
+				db.execute(
+					"insert or replace into font_index values (?, ?, ?)",
+					(mid, css_hash(css), json.dumps(font_index)),
+				)
+				db.commit()
+			except sqlite3.DatabaseError:
+				self._reset()
+
+	def close(self) -> None:
+		with self._lock:
+			if self._db is not None:
+				self._db.close()
+				self._db = None
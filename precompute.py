@@ -0,0 +1,162 @@
+import json
+import re
+import sqlite3
+
+# the note type keys the typebox rendering reads
+MODEL_KEYS = ("id", "mod", "css", "flds", "tmpls")
+
+
+def snapshot(model) -> dict:
+	"""A copy of the parts of a note type needed off the main thread."""
+	return {name: model[name] for name in MODEL_KEYS}
+
+
+def typebox_fields(model, pattern: str) -> list:
+	"""Names of the fields used by typeboxes in the note type's question templates."""
+	names = []
+	for template in model["tmpls"]:
+		for name in re.findall(pattern, template["qfmt"]):
+			if name not in names:
+				names.append(name)
+	return names
+
+
+def _varint(data: bytes, pos: int):
+	value = shift = 0
+	while True:
+		byte = data[pos]
+		pos += 1
+		value |= (byte & 0x7F) << shift
+		if byte < 0x80:
+			return value, pos
+		shift += 7
+
+
+def _proto_fields(data: bytes) -> dict:
+	"""
+	The scalar fields of a serialized protobuf message by field number, the
+	last one winning: varints as ints, length-delimited fields as bytes. Just
+	enough to read the config blobs of Anki's notetypes tables.
+	"""
+	fields = {}
+	pos = 0
+	while pos < len(data):
+		key, pos = _varint(data, pos)
+		number, wire_type = key >> 3, key & 7
+		if wire_type == 0:
+			fields[number], pos = _varint(data, pos)
+		elif wire_type == 2:
+			length, pos = _varint(data, pos)
+			fields[number] = data[pos : pos + length]
+			pos += length
+		elif wire_type == 1:
+			pos += 8
+		elif wire_type == 5:
+			pos += 4
+		else:
+			raise ValueError("unsupported protobuf wire type %d" % wire_type)
+	return fields
+
+
+def _text(fields: dict, number: int) -> str:
+	return fields.get(number, b"").decode("utf-8")
+
+
+# the numbers of the fields read from Notetype.Config, Notetype.Field.Config
+# and Notetype.Template.Config in Anki's notetypes.proto
+NOTETYPE_CSS = 3
+FIELD_FONT_NAME = 3
+FIELD_FONT_SIZE = 4
+TEMPLATE_QFMT = 1
+TEMPLATE_AFMT = 2
+
+
+def _note_types_from_tables(db) -> list:
+	models = {}
+	for mid, name, mod, config in db.execute("select id, name, mtime_secs, config from notetypes"):
+		models[mid] = {
+			"id": mid,
+			"mod": mod,
+			"name": name,
+			"css": _text(_proto_fields(config), NOTETYPE_CSS),
+			"flds": [],
+			"tmpls": [],
+		}
+	for mid, ord, name, config in db.execute("select ntid, ord, name, config from fields order by ntid, ord"):
+		config = _proto_fields(config)
+		models[mid]["flds"].append(
+			{
+				"name": name,
+				"ord": ord,
+				# proto3 leaves out empty values; these are Anki's defaults
+				"font": _text(config, FIELD_FONT_NAME) or "Arial",
+				"size": config.get(FIELD_FONT_SIZE) or 20,
+			}
+		)
+	for mid, ord, name, config in db.execute("select ntid, ord, name, config from templates order by ntid, ord"):
+		config = _proto_fields(config)
+		models[mid]["tmpls"].append(
+			{
+				"name": name,
+				"ord": ord,
+				"qfmt": _text(config, TEMPLATE_QFMT),
+				"afmt": _text(config, TEMPLATE_AFMT),
+			}
+		)
+	return list(models.values())
+
+
+def note_types_from_collection_file(path: str) -> list:
+	"""
+	Read the note types of a collection.anki2 file without opening it in
+	Anki, as the note type dicts the add-on renders from. Reads the notetypes,
+	fields and templates tables of Anki 2.1.28 and later, and the JSON in the
+	`col` table of older collections.
+	"""
+	db = sqlite3.connect("file:%s?mode=ro" % path, uri=True)
+	try:
+		tables = {name for (name,) in db.execute("select name from sqlite_master where type = 'table'")}
+		if "notetypes" in tables:
+			return _note_types_from_tables(db)
+		try:
+			row = db.execute("select models from col").fetchone()
+		except sqlite3.OperationalError as e:
+			raise ValueError("%s has no note types to read" % path) from e
+	finally:
+		db.close()
+	if not row or not row[0]:
+		return []
+	return list(json.loads(row[0]).values())
+
+
+def _warm_note_type(model, fields, render) -> int:
+	for fld in fields:
+		# both renderings: a filled answer field, and the fallback for an empty one
+		render(model, fld, True)
+		render(model, fld, False)
+	return len(fields)
+
+
+def warm(models, render, pattern: str, executor=None, note_types=None) -> list:
+	"""
+	Run `render(model, field, has_answer)` for every typebox of every note
+	type in `models`, so their styling is cached before the first review.
+	The note types that have typeboxes are recorded in the `note_types` dict,
+	if given, mapping their id to the mod that was rendered.
+
+	With an executor each note type is a separate job and the futures are
+	returned; otherwise the work is done right away and the number of
+	rendered typeboxes per note type is returned.
+	"""
+	results = []
+	for model in models:
+		fields = typebox_fields(model, pattern)
+		if not fields:
+			continue
+		if note_types is not None:
+			note_types[model["id"]] = model["mod"]
+		if executor is None:
+			results.append(_warm_note_type(model, fields, render))
+		else:
+			results.append(executor.submit(_warm_note_type, model, fields, render))
+	return results
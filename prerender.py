@@ -0,0 +1,51 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# how many upcoming cards get their typebox rendered ahead of time
+PRERENDER_AHEAD = 5
+
+
+def upcoming_card_ids(sched, current_id, count: int) -> list:
+	"""
+	Peek at the ids of the next cards the scheduler will show, without
+	changing its queues. Works with the v3 scheduler's queued cards and with
+	the queues of the older schedulers.
+	"""
+	get_queued_cards = getattr(sched, "get_queued_cards", None)
+	if get_queued_cards is not None:
+		# the card being shown stays at the head of the queue until answered
+		queued = get_queued_cards(fetch_limit=count + 1).cards
+		ids = [c.card.id for c in queued]
+	else:
+		ids = []
+		for queue in ("_lrnQueue", "_lrnDayQueue", "_revQueue", "_newQueue"):
+			for entry in getattr(sched, queue, None) or ():
+				# intraday learning entries are (due, id) pairs
+				ids.append(entry[1] if isinstance(entry, tuple) else entry)
+	return [cid for cid in ids if cid != current_id][:count]
+
+
+class Prerenderer:
+	"""
+	Runs a render function for upcoming cards on a background thread, so its
+	results are cached by the time those cards are shown. A job is skipped
+	while another one with the same key is still pending.
+	"""
+
+	def __init__(self, render):
+		self.render = render
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="typebox")
+		self._pending = set()
+
+	def submit(self, key, *args) -> None:
+		if key in self._pending:
+			return
+		self._pending.add(key)
+		future = self._executor.submit(self.render, *args)
+		future.add_done_callback(lambda f: self._pending.discard(key))
+
+
+def typebox_field(template: str, pattern: str):
+	"""The field named by the first typebox in a card template, or None."""
+	m = re.search(pattern, template)
+	return m.group(1) if m else None
@@ -0,0 +1,77 @@
+"""
+Opt-in cProfile capture of review sessions.
+
+Turned on with "profile_reviews" in the add-on's config. While it's on, the
+reviewer filter and the add-on's reviewer hooks run under one profiler, and
+when the reviewer closes the session's profile is written to user_files/
+profiles as a .prof file, for snakeviz or pstats, and a .txt summary sorted
+by cumulative time.
+
+Only the main thread is profiled; the prerender and warm-up threads are not.
+"""
+
+import cProfile
+import functools
+import os
+import pstats
+import time
+
+# how many functions the text summary lists
+SUMMARY_LINES = 60
+
+_profile = None
+# whether a profiled call is already running, so nested ones aren't profiled twice
+_active = False
+
+
+def enable() -> None:
+	global _profile
+	if _profile is None:
+		_profile = cProfile.Profile()
+
+
+def disable() -> None:
+	"""Stop profiling, throwing away what wasn't dumped yet."""
+	global _profile
+	_profile = None
+
+
+def is_enabled() -> bool:
+	return _profile is not None
+
+
+def profiled(fn):
+	"""Wrap fn so its calls are profiled while profiling is enabled."""
+
+	@functools.wraps(fn)
+	def wrapper(*args, **kwargs):
+		global _active
+		profile = _profile
+		if profile is None or _active:
+			return fn(*args, **kwargs)
+		_active = True
+		try:
+			return profile.runcall(fn, *args, **kwargs)
+		finally:
+			_active = False
+
+	return wrapper
+
+
+def dump(directory: str) -> list:
+	"""
+	Write the profile collected so far to `directory` and start a new one.
+	Returns the paths of the .prof and .txt files, or [] if nothing was
+	profiled.
+	"""
+	global _profile
+	profile = _profile
+	if profile is None or not profile.getstats():
+		return []
+	_profile = cProfile.Profile()
+	os.makedirs(directory, exist_ok=True)
+	base = os.path.join(directory, "review-%s" % time.strftime("%Y%m%d-%H%M%S"))
+	profile.dump_stats(base + ".prof")
+	with open(base + ".txt", "w", encoding="utf-8") as f:
+		pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+	return [base + ".prof", base + ".txt"]
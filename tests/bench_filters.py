@@ -0,0 +1,98 @@
+"""
+    Benchmark for the reviewer filters
+    ----------------------------------
+
+    Note: this file is not named test_*.py as it is not part of the
+    test suite ran by pytest. Run it from this directory:
+
+        python bench_filters.py [--cards N] [--models N] [--rules N]
+
+    Drives Reviewer.typeAnsFilter over a generated corpus through the
+    harness and reports per-call latency percentiles and allocations for
+    each side of the card.
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+
+import harness
+
+
+def percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))))
+    return sorted_values[index]
+
+
+def report(name, timings, blocks, peaks):
+    timings.sort()
+    print('%-9s n=%-5d p50=%8.3fms p90=%8.3fms p99=%8.3fms max=%8.3fms' % (
+        name, len(timings), *(percentile(timings, p) * 1000
+                              for p in (50, 90, 99, 100))))
+    print('%-9s allocated blocks/call: mean=%.1f  peak traced bytes/call: '
+          'max=%d' % ('', sum(blocks) / len(blocks), max(peaks)))
+
+
+def measure(call, trace):
+    if trace:
+        tracemalloc.reset_peak()
+        before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - start
+        return (result, elapsed, sys.getallocatedblocks() - before,
+                tracemalloc.get_traced_memory()[1])
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start, 0, 0
+
+
+def run(args):
+    addon, mw = harness.load_addon()
+    cards = harness.make_corpus(
+        mw, n_models=args.models, n_fields=args.fields, n_rules=args.rules,
+        n_cards=args.cards, n_lines=args.lines, seed=args.seed)
+    rng = random.Random(args.seed)
+    reviewer = mw.reviewer
+    results = {'question': ([], [], []), 'answer': ([], [], [])}
+    if args.trace:
+        tracemalloc.start()
+    gc.disable()
+    try:
+        for card in cards:
+            typed = harness.typed_answer(card, rng)
+            for side, call in (
+                    ('question', lambda: harness.show_question(reviewer, card)),
+                    ('answer', lambda: harness.show_answer(reviewer, card,
+                                                           typed))):
+                _, elapsed, blocks, peak = measure(call, args.trace)
+                timings, all_blocks, peaks = results[side]
+                timings.append(elapsed)
+                all_blocks.append(blocks)
+                peaks.append(peak)
+    finally:
+        gc.enable()
+        if args.trace:
+            tracemalloc.stop()
+    for side, (timings, blocks, peaks) in results.items():
+        report(side, timings, blocks, peaks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cards', type=int, default=500)
+    parser.add_argument('--models', type=int, default=5)
+    parser.add_argument('--fields', type=int, default=12)
+    parser.add_argument('--rules', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-trace', dest='trace', action='store_false',
+                        help='skip allocation tracking, which slows calls')
+    run(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
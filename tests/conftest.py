@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the add-on modules that don't need Anki are imported directly; the add-on
+# package as a whole is loaded by harness.load_addon
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
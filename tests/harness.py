@@ -0,0 +1,324 @@
+"""
+    Headless harness for the reviewer filters
+    -----------------------------------------
+
+    Loads the add-on outside of Anki, with small stand-ins for the parts of
+    aqt it uses, and drives Reviewer.typeAnsFilter through the question and
+    answer sides of generated cards.
+"""
+
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import types
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_NAME = 'ankiTypebox'
+
+
+class Hook(list):
+    """A gui_hooks hook: callbacks are appended and run in order."""
+
+    def __call__(self, *args):
+        for callback in self:
+            callback(*args)
+
+
+class Reviewer(object):
+    """The bits of aqt.reviewer.Reviewer the add-on relies on."""
+
+    typeAnsPat = r'\[\[type:(.+?)\]\]'
+
+    def __init__(self, mw):
+        self.mw = mw
+        self.web = mw.web
+        self.card = None
+        self.state = None
+        self.typedAnswer = None
+        self.typeCorrect = None
+
+    def typeAnsQuestionFilter(self, buf):
+        return buf
+
+    def typeAnsAnswerFilter(self, buf):
+        return buf
+
+
+class Media(object):
+    def strip(self, txt):
+        return txt
+
+
+class Scheduler(object):
+    def __init__(self):
+        self._lrnQueue = []
+        self._revQueue = []
+        self._newQueue = []
+
+
+class ModelManager(object):
+    def __init__(self):
+        self.models = {}
+
+    def all(self):
+        return list(self.models.values())
+
+    def get(self, id):
+        return self.models.get(id)
+
+    def save(self, m=None):
+        if m is not None:
+            m['mod'] += 1
+            self.models[m['id']] = m
+
+    def remove(self, id):
+        del self.models[id]
+
+
+class Collection(object):
+    def __init__(self):
+        self.media = Media()
+        self.sched = Scheduler()
+        self.models = ModelManager()
+        self.cards = {}
+
+    def getCard(self, cid):
+        return self.cards[cid]
+
+
+class WebView(object):
+    def __init__(self):
+        self.evals = []
+
+    def setFocus(self):
+        pass
+
+    def eval(self, js):
+        self.evals.append(js)
+
+
+class WebContent(object):
+    """What webview_will_set_content hooks get to add to a page."""
+
+    def __init__(self):
+        self.head = ''
+        self.body = ''
+
+
+class AddonManager(object):
+    def __init__(self, config=None):
+        self.config = config
+        self.config_actions = {}
+
+    def getConfig(self, module):
+        return self.config
+
+    def setConfigUpdatedAction(self, module, action):
+        self.config_actions[module] = action
+
+
+class TaskManager(object):
+    """Keeps run_on_main callbacks until the test runs them."""
+
+    def __init__(self):
+        self.pending = []
+
+    def run_on_main(self, closure):
+        self.pending.append(closure)
+
+    def run_pending(self):
+        pending, self.pending = self.pending, []
+        for closure in pending:
+            closure()
+
+
+class MainWindow(object):
+    def __init__(self):
+        self.col = Collection()
+        self.web = WebView()
+        self.taskman = TaskManager()
+        self.addonManager = AddonManager()
+        self.reviewer = Reviewer(self)
+
+
+class Note(object):
+    def __init__(self, model, values, nid=0, mod=1):
+        self.id = nid
+        self.mod = mod
+        self._model = model
+        self.fields = list(values)
+
+    def __getitem__(self, name):
+        for f in self._model['flds']:
+            if f['name'] == name:
+                return self.fields[f['ord']]
+        raise KeyError(name)
+
+
+class Card(object):
+    def __init__(self, cid, model, note, ord=0):
+        self.id = cid
+        self._model = model
+        self._note = note
+        self.ord = ord
+
+    def model(self):
+        return self._model
+
+    def note(self):
+        return self._note
+
+    def template(self):
+        return self._model['tmpls'][self.ord]
+
+
+def install_stubs(config=None):
+    """
+    Register the aqt stand-ins in sys.modules, replacing any real ones.
+    """
+    mw = MainWindow()
+    mw.addonManager.config = config
+    aqt = types.ModuleType('aqt')
+    aqt.mw = mw
+    aqt.reviewer = types.ModuleType('aqt.reviewer')
+    aqt.reviewer.Reviewer = Reviewer
+    aqt.theme = types.ModuleType('aqt.theme')
+    aqt.theme.theme_manager = types.SimpleNamespace(night_mode=False)
+    aqt.gui_hooks = types.ModuleType('aqt.gui_hooks')
+    aqt.gui_hooks.reviewer_did_show_question = Hook()
+    aqt.gui_hooks.profile_did_open = Hook()
+    aqt.gui_hooks.sync_did_finish = Hook()
+    aqt.gui_hooks.profile_will_close = Hook()
+    aqt.gui_hooks.reviewer_will_end = Hook()
+    aqt.gui_hooks.webview_will_set_content = Hook()
+    aqt.gui_hooks.operation_did_execute = Hook()
+    sys.modules['aqt'] = aqt
+    sys.modules['aqt.reviewer'] = aqt.reviewer
+    sys.modules['aqt.gui_hooks'] = aqt.gui_hooks
+    sys.modules['aqt.theme'] = aqt.theme
+    return mw
+
+
+def load_addon(user_files=None, config=None):
+    """
+    Import the add-on package from the repository with fresh stand-ins,
+    returning (addon module, main window stand-in). The add-on keeps its
+    files in `user_files`, a new temporary directory by default, and reads
+    `config` as its config.json.
+    """
+    for name in list(sys.modules):
+        if name == ADDON_NAME or name.startswith(ADDON_NAME + '.'):
+            del sys.modules[name]
+    mw = install_stubs(config)
+    spec = importlib.util.spec_from_file_location(
+        ADDON_NAME, os.path.join(ADDON_DIR, '__init__.py'),
+        submodule_search_locations=[ADDON_DIR])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_NAME] = addon
+    spec.loader.exec_module(addon)
+    if user_files is None:
+        user_files = tempfile.mkdtemp(prefix='typebox-user-files-')
+    addon._USER_FILES = user_files
+    addon._style_store = addon.StyleStore(
+        os.path.join(user_files, 'style_cache.sqlite'))
+    return addon, mw
+
+
+def make_model(mid, n_fields, n_rules, rng):
+    """A note type with a typebox on its last field and n_rules css rules."""
+    fields = [
+        {'name': 'Field %d' % i, 'ord': i,
+         'font': rng.choice(['Arial', 'Liberation Sans', 'monospace']),
+         'size': rng.choice([16, 18, 20])}
+        for i in range(n_fields)]
+    rules = ['.card { font-family: "Fira Code", monospace; font-size: 20px; '
+             'text-align: left; color: black; }']
+    for i in range(n_rules):
+        rules.append('.rule-%d > p, .rule-%d:hover { margin: %dpx auto; '
+                     'color: #%06x; }' % (i, i, i % 20, rng.randrange(1 << 24)))
+    rules.append('.textbox-output { font-size: 18px; }')
+    answer = fields[-1]['name']
+    return {
+        'id': mid,
+        'mod': 1,
+        'name': 'Typebox %d' % mid,
+        'css': '\n'.join(rules),
+        'flds': fields,
+        'tmpls': [{
+            'name': 'Card 1',
+            'qfmt': '{{Field 0}}<br>[[typebox:%s]]' % answer,
+            'afmt': '{{FrontSide}}<hr id=answer>[[typebox:%s]]' % answer,
+        }],
+    }
+
+
+def make_answer(rng, n_lines):
+    words = ('def', 'return', 'x', 'value', 'for', 'in', 'range', 'if',
+             'else', '&lt;', '&amp;', 'print', '(', ')', ':')
+    lines = [' '.join(rng.choice(words) for _ in range(rng.randint(2, 10)))
+             for _ in range(n_lines)]
+    return '<div>' + '</div><div>'.join(lines) + '</div>'
+
+
+def make_corpus(mw, n_models=5, n_fields=12, n_rules=200, n_cards=200,
+                n_lines=20, seed=0):
+    """Generate note types and cards, registering the cards with mw.col."""
+    rng = random.Random(seed)
+    models = [make_model(1000 + i, n_fields, n_rules, rng)
+              for i in range(n_models)]
+    for model in models:
+        mw.col.models.models[model['id']] = model
+    cards = []
+    for cid in range(1, n_cards + 1):
+        model = rng.choice(models)
+        values = ['question %d' % cid] * (n_fields - 1)
+        values.append(make_answer(rng, rng.randint(1, n_lines)))
+        card = Card(cid, model, Note(model, values, nid=cid))
+        mw.col.cards[cid] = card
+        cards.append(card)
+    mw.col.sched._revQueue = [card.id for card in cards]
+    return cards
+
+
+def typed_answer(card, rng):
+    """What a user might type: the answer with a few typos."""
+    addon = sys.modules[ADDON_NAME]
+    text = list(addon.html_to_text(card.note().fields[-1]))
+    for _ in range(rng.randint(0, 5)):
+        if text:
+            text[rng.randrange(len(text))] = rng.choice('xyz ')
+    return ''.join(text)
+
+
+def question_html(card):
+    return card.template()['qfmt'].replace(
+        '{{Field 0}}', card.note().fields[0])
+
+
+def answer_html(card):
+    return card.template()['afmt'].replace(
+        '{{FrontSide}}', question_html(card))
+
+
+def show_question(reviewer, card):
+    """
+    Run the question side of a card through the filter and the hooks that
+    follow it, like Anki does.
+    """
+    queue = reviewer.mw.col.sched._revQueue
+    if card.id in queue:
+        queue.remove(card.id)
+    reviewer.card = card
+    reviewer.state = 'question'
+    html = reviewer.typeAnsFilter(question_html(card))
+    sys.modules['aqt.gui_hooks'].reviewer_did_show_question(card)
+    return html
+
+
+def show_answer(reviewer, card, typed):
+    """Run the answer side, with `typed` as the content of the typebox."""
+    reviewer.state = 'answer'
+    reviewer.typedAnswer = typed
+    return reviewer.typeAnsFilter(answer_html(card))
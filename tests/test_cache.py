@@ -0,0 +1,119 @@
+"""
+    Tests for the add-on's caches
+    -----------------------------
+"""
+
+import sys
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import harness
+from cache import CacheManager, LRUCache, sizeof
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    # b was the least recently used
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.get('b') is None
+    assert cache.stats() == {
+        'entries': 2,
+        'bytes': sizeof('a') + sizeof(1) + sizeof('c') + sizeof(3),
+        'hits': 1, 'misses': 1}
+
+
+def test_byte_limit():
+    cache = LRUCache(maxsize=100, maxbytes=3 * sizeof(('k', 'x' * 100)))
+    for i in range(5):
+        cache.set(str(i), 'x' * 100)
+    assert len(cache) == 3
+    assert cache.bytes <= cache.maxbytes
+    # a value bigger than the limit still gets cached on its own
+    cache.set('big', 'x' * 10000)
+    assert len(cache) == 1 and 'big' in cache
+    cache.clear()
+    assert cache.bytes == 0
+
+
+def test_manager_limit_and_invalidation():
+    manager = CacheManager()
+    by_note_type = manager.cache('by note type', note_type=lambda key: key[0])
+    other = manager.cache('other')
+    for mid in (1, 2):
+        for i in range(10):
+            by_note_type.set((mid, i), 'x' * 100)
+    other.set(1, 'y')
+    assert manager.invalidate_note_type(1) == 10
+    assert len(by_note_type) == 10 and 1 in other
+
+    # the biggest cache gives way first
+    manager.configure(manager.bytes // 2)
+    assert manager.bytes <= manager.maxbytes
+    assert len(by_note_type) < 10 and 1 in other
+    assert set(manager.stats()) == {'by note type', 'other'}
+    manager.clear()
+    assert manager.bytes == 0
+
+
+def operation(addon, notetype):
+    """Let the add-on know an operation ran, and wait for it to warm up."""
+    addon._precompute_executor = ThreadPoolExecutor(max_workers=1)
+    sys.modules['aqt.gui_hooks'].operation_did_execute(
+        types.SimpleNamespace(notetype=notetype), None)
+    addon._precompute_executor.shutdown(wait=True)
+
+
+def test_addon_caches():
+    addon, mw = harness.load_addon(config={'cache_megabytes': 1})
+    assert addon.caches.maxbytes == 1024 * 1024
+    cards = harness.make_corpus(mw, n_models=2, n_rules=5, n_cards=10)
+    for card in cards:
+        harness.show_question(mw.reviewer, card)
+    stats = addon.caches.stats()
+    assert stats['questions']['misses'] and stats['font indexes']['entries']
+
+    addon._prerenderer._executor.shutdown(wait=True)
+
+    # edits in the note type dialogs are reported as operations
+    model = cards[0].model()
+    mw.col.models.save(model)
+    operation(addon, notetype=False)
+    assert any(key[1] != model['mod'] for key in addon._question_cache._data)
+    others = [key for key in addon._question_cache._data
+              if key[0] != model['id']]
+    assert others
+    operation(addon, notetype=True)
+    edited = [key for key in addon._question_cache._data
+              if key[0] == model['id']]
+    assert sorted(key[1:4] for key in edited) == [
+        (model['mod'], 'Field 11', False), (model['mod'], 'Field 11', True)]
+    # only the edited note type is dropped and warmed again
+    assert [key for key in addon._question_cache._data
+            if key[0] != model['id']] == others
+
+    # removed note types are dropped and not warmed again
+    mw.col.models.remove(model['id'])
+    operation(addon, notetype=True)
+    assert all(key[0] != model['id'] for key in addon._question_cache._data)
+    assert all(key[0] != model['id'] for key in addon._font_index_cache._data)
+
+    # edits to config.json apply right away
+    mw.addonManager.config_actions[harness.ADDON_NAME]({'cache_megabytes': 0})
+    assert addon.caches.maxbytes is None
+
+
+def test_big_stylesheets_are_not_counted_per_entry():
+    addon, mw = harness.load_addon()
+    cards = harness.make_corpus(mw, n_models=1, n_rules=2000, n_cards=20)
+    css = len(cards[0].model()['css'])
+    assert css > 100000
+    for card in cards:
+        harness.show_question(mw.reviewer, card)
+    addon._prerenderer._executor.shutdown(wait=True)
+    # a question entry and a font index, neither of them holding the css
+    assert len(addon._question_cache) == 1
+    assert addon.caches.bytes < css
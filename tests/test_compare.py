@@ -0,0 +1,199 @@
+"""
+    Tests for the typed answer comparison
+    -------------------------------------
+"""
+
+import difflib
+import random
+
+import pytest
+import compare as compare_module
+from compare import (
+    compare, compare_and_score, edit_distance, line_matching_blocks,
+    matching_blocks, similarity, tokenize_comparison)
+
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y
+                           else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def check_blocks(a, b, blocks):
+    i_end = j_end = 0
+    for i, j, n in blocks:
+        assert n > 0
+        assert i >= i_end and j >= j_end
+        assert a[i:i + n] == b[j:j + n]
+        i_end, j_end = i + n, j + n
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matching_blocks_are_a_longest_common_subsequence(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        a = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 25)))
+        b = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 25)))
+        blocks = matching_blocks(a, b)
+        check_blocks(a, b, blocks)
+        assert sum(n for _, _, n in blocks) == lcs_length(a, b), (a, b)
+
+
+def test_matching_blocks_on_sequences():
+    a = ['x = 1', 'y = 2', 'z = 3']
+    b = ['x = 1', 'z = 3']
+    assert matching_blocks(a, b) == [(0, 0, 1), (2, 1, 1)]
+
+
+def test_edit_limit():
+    a = 'start ' + 'abcd' * 50 + ' end'
+    b = 'start ' + 'dcba' * 50 + ' end'
+    # too far apart: only the common prefix and suffix are kept
+    assert matching_blocks(a, b, max_edits=4) == [
+        (0, 0, 6), (len(a) - 4, len(b) - 4, 4)]
+    blocks = matching_blocks(a, b)
+    check_blocks(a, b, blocks)
+    assert sum(n for _, _, n in blocks) == lcs_length(a, b)
+
+
+def test_tokenize_comparison_like_difflib():
+    given, correct = 'the quick brwn fox', 'the quick brown fox!'
+    matcher = difflib.SequenceMatcher(None, given, correct, autojunk=False)
+    expected = tokenize_comparison(
+        given, correct, blocks=matcher.get_matching_blocks())
+    assert tokenize_comparison(given, correct) == expected
+    assert expected == (
+        [(True, 'the quick br'), (True, 'wn fox')],
+        [(True, 'the quick br'), (False, 'o'), (True, 'wn fox'),
+         (False, '!')])
+
+
+def test_compare():
+    assert compare('a <b>', 'a <b>') == (
+        '<div><code id=typeans><span class=typeGood>a &lt;b&gt;</span>'
+        '</code></div>')
+    assert compare('cat', 'cart') == (
+        '<div><code id=typeans><span class=typeGood>ca</span>'
+        '<span class=typeGood>t</span>'
+        '<br><span id=typearrow>&darr;</span><br>'
+        '<span class=typeGood>ca</span><span class=typeMissed>r</span>'
+        '<span class=typeGood>t</span></code></div>')
+    assert compare('', 'x') == (
+        '<div><code id=typeans><br><span id=typearrow>&darr;</span><br>'
+        '<span class=typeMissed>x</span></code></div>')
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_line_mode_blocks(seed):
+    rng = random.Random(seed)
+    lines = ['def f(x):\n', '    return x\n', 'pass\n', '\n', 'x = 1\n',
+             'y = 2\n', 'print(x)\n']
+    for _ in range(30):
+        a = ''.join(rng.choice(lines) for _ in range(rng.randint(0, 12)))
+        b = list(a)
+        for _ in range(rng.randint(0, 4)):
+            b.insert(rng.randint(0, len(b)), rng.choice('x\n '))
+        b = ''.join(b)
+        blocks = line_matching_blocks(a, b)
+        check_blocks(a, b, blocks)
+        given, correct = tokenize_comparison(a, b, mode='line')
+        assert ''.join(text for _, text in given) == a
+        assert ''.join(text for _, text in correct) == b
+
+
+def test_line_mode_anchors_lines():
+    correct = 'one\ntwo\nthree\nfour\n'
+    given = 'one\nthree\ntwo\nfour\n'
+    assert tokenize_comparison(given, correct, mode='line') == (
+        [(True, 'one\n'), (False, 'three\n'), (True, 'two\n'),
+         (True, 'four\n')],
+        [(True, 'one\n'), (True, 'two\n'), (False, 'three\n'),
+         (True, 'four\n')])
+    # lines that changed are still diffed by character
+    assert tokenize_comparison('a\nfoo bar\nb', 'a\nfoo baz\nb',
+                               mode='line') == (
+        [(True, 'a\nfoo ba'), (False, 'r'), (True, '\nb')],
+        [(True, 'a\nfoo ba'), (False, 'z'), (True, '\nb')])
+
+
+def test_line_mode_shares_the_edit_limit():
+    a = 'xaxb\nSAME\nxaxb\n'
+    b = 'yayb\nSAME\nyayb\n'
+    # each changed line takes 4 edits
+    assert line_matching_blocks(a, b, max_edits=8) == [
+        (1, 1, 1), (3, 3, 7), (11, 11, 1), (13, 13, 2)]
+    # the second one is past the limit, only its common suffix is kept
+    assert line_matching_blocks(a, b, max_edits=4) == [
+        (1, 1, 1), (3, 3, 7), (13, 13, 2)]
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_edit_distance(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        # long enough for the bit vectors to span several machine words
+        a = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 150)))
+        b = ''.join(rng.choice('abc') for _ in range(rng.randint(0, 150)))
+        assert edit_distance(a, b) == levenshtein(a, b), (a, b)
+
+
+def test_edit_distance_of_long_answers(monkeypatch):
+    rng = random.Random(0)
+    a = ''.join(rng.choice('abcdefgh ') for _ in range(400))
+    b = list(a)
+    for i in rng.sample(range(len(b)), 8):
+        b[i] = 'x'
+    b = ''.join(b)
+    expected = levenshtein(a, b)
+    assert edit_distance(a, b) == expected
+    # scored gap by gap along the diff's alignment
+    monkeypatch.setattr(compare_module, 'MAX_DISTANCE_CELLS', 16)
+    assert edit_distance(a, b) == expected
+    # gaps too big to score are bounded by their length
+    assert edit_distance('a' + 'x' * 40, 'a' + 'y' * 60) == 60
+    # and the sum of the gaps by the longer answer
+    assert edit_distance('p' * 10 + 'm' + 'q', 'r' + 'm' + 's' * 10) == 12
+
+
+def test_similarity_of_rewritten_answers():
+    rng = random.Random(1)
+    words = 'the a of wind sea night over light and stars falls'.split()
+
+    def poem():
+        return '\n'.join(' '.join(rng.choice(words) for _ in range(8))
+                         for _ in range(20))
+    a, b = poem(), poem()
+    # over 512 by 512 differing characters
+    assert len(a) * len(b) > 1 << 18
+    expected = 1 - levenshtein(a, b) / max(len(a), len(b))
+    assert similarity(a, b) == pytest.approx(expected)
+    assert compare_and_score(a, b, mode='line')[1] == pytest.approx(expected)
+
+    # unrelated long answers are scored 0 at worst
+    a = '\n'.join('a' * 99 for _ in range(100))
+    b = '\n'.join('b' * 99 for _ in range(100))
+    assert 0 <= similarity(a, b) < 0.1
+
+
+def test_similarity():
+    assert similarity('', '') == 1.0
+    assert similarity('abc', 'abc') == 1.0
+    assert similarity('', 'abcd') == 0.0
+    assert similarity('abcd', 'abxd') == 0.75
+    assert compare_and_score('cat', 'cart') == (compare('cat', 'cart'), 0.75)
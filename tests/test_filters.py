@@ -0,0 +1,360 @@
+"""
+    Tests for the reviewer filters
+    ------------------------------
+
+    The add-on is loaded through the headless harness.
+"""
+
+import importlib
+import pstats
+import random
+import re
+import sys
+import time
+
+import harness
+import pytest
+
+
+@pytest.fixture
+def addon():
+    addon, mw = harness.load_addon()
+    cards = harness.make_corpus(mw, n_models=2, n_rules=5, n_cards=10)
+    return addon, mw, cards
+
+
+def test_question_and_answer(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[0]
+    question = harness.show_question(reviewer, card)
+    assert '[[typebox:' not in question
+    assert '<textarea id=typeans class=textbox-input' in question
+    # .card styling wins over the field font
+    assert "--typebox-font: 'Fira Code, monospace'; --typebox-size: 20px;" in question
+    assert '<script>' not in question
+    assert reviewer._typebox_note
+
+    typed = addon.html_to_text(card.note().fields[-1])
+    answer = harness.show_answer(reviewer, card, typed)
+    assert '[[typebox:' not in answer
+    assert answer.startswith('question 1<br><hr id=answer>')
+    assert '<pre class=textbox-output><div><code id=typeans>' in answer
+    assert 'typeBad' not in answer and 'typeMissed' not in answer
+    assert '<div class=textbox-score data-ease=3>100%</div>' in answer
+    # .textbox-output only changes the size
+    assert ("<div class=textbox-output-parent style=\"--typebox-font: "
+            "'Fira Code, monospace'; --typebox-size: 18px;\">") in answer
+    assert '<style>' not in answer
+
+
+def test_typos_are_marked(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[1]
+    harness.show_question(reviewer, card)
+    typed = harness.typed_answer(card, random.Random(3)) + '!'
+    answer = harness.show_answer(reviewer, card, typed)
+    assert '<span class=typeBad>!</span>' in answer
+    assert 0 < reviewer.typeboxScore < 1
+    assert '%d%%</div>' % int(reviewer.typeboxScore * 100) in answer
+
+
+def test_correct_answer_is_normalized_once_per_note_version(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[2]
+    stripped = []
+
+    def strip(txt):
+        stripped.append(txt)
+        return txt
+
+    mw.col.media.strip = strip
+    typed = addon.html_to_text(card.note().fields[-1])
+    for _ in range(2):
+        harness.show_question(reviewer, card)
+        first = harness.show_answer(reviewer, card, typed)
+    assert len(stripped) == 1
+
+    # an edited note is normalized again
+    card.note().fields[-1] = '<div>changed</div>'
+    card.note().mod += 1
+    harness.show_question(reviewer, card)
+    answer = harness.show_answer(reviewer, card, 'changed')
+    assert len(stripped) == 2
+    assert answer != first and 'typeBad' not in answer
+
+
+def test_long_answers_are_compared_in_the_background(addon):
+    addon, mw, cards = addon
+    addon.ASYNC_COMPARE_CHARS = 10
+    reviewer = mw.reviewer
+    card = cards[5]
+    harness.show_question(reviewer, card)
+    typed = harness.typed_answer(card, random.Random(5)) + '<'
+    answer = harness.show_answer(reviewer, card, typed)
+    assert 'id=typeans' not in answer
+    assert '>%s</pre>' % addon.html.escape(typed) in answer
+    assert reviewer.typeboxScore is None
+    generation = addon._compare_generation
+    assert 'data-typebox-pending=%d>' % generation in answer
+
+    addon._compare_executor.shutdown(wait=True)
+    assert not mw.web.evals
+    mw.taskman.run_pending()
+    js, = mw.web.evals
+    assert "[data-typebox-pending='%d']" % generation in js
+    assert '<span class=typeBad>&lt;</span>' in js
+    assert 0 < reviewer.typeboxScore < 1
+
+
+def test_background_comparison_is_dropped_on_next_card(addon):
+    addon, mw, cards = addon
+    addon.ASYNC_COMPARE_CHARS = 10
+    reviewer = mw.reviewer
+    harness.show_question(reviewer, cards[6])
+    typed = harness.typed_answer(cards[6], random.Random(6))
+    harness.show_answer(reviewer, cards[6], typed)
+    harness.show_question(reviewer, cards[7])
+    addon._compare_executor.shutdown(wait=True)
+    mw.taskman.run_pending()
+    assert not mw.web.evals
+    assert reviewer.typeboxScore is None
+
+
+def test_script_and_style_are_added_to_the_reviewer_page(addon):
+    addon, mw, cards = addon
+    hook = sys.modules['aqt.gui_hooks'].webview_will_set_content
+    content = harness.WebContent()
+    hook(content, mw.reviewer)
+    assert content.head.count('function typeboxAns()') == 1
+    assert 'var(--typebox-font' in content.head
+    # no more specific than the note type's own .textbox-output rules
+    assert '\n.textbox-output {' in content.head
+    assert 'pre.textbox-output' not in content.head
+    other = harness.WebContent()
+    hook(other, object())
+    assert not other.head
+
+
+def test_cards_without_typebox_pass_through(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    reviewer.card = cards[0]
+    reviewer.state = 'question'
+    assert reviewer.typeAnsFilter('{{Front}} [[type:Back]]') == (
+        '{{Front}} [[type:Back]]')
+    assert not reviewer._typebox_note
+
+
+def test_cards_without_typebox_are_returned_as_is(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    reviewer.card = cards[0]
+    buf = '{{Front}} [[type:Back]] [[typebox'
+    assert reviewer.typeboxAnsQuestionFilter(buf) is buf
+
+
+def count_calls(monkeypatch, owner, name):
+    calls = []
+    original = getattr(owner, name)
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(owner, name, counted)
+    return calls
+
+
+def test_upcoming_cards_are_prerendered(addon):
+    addon, mw, cards = addon
+    harness.show_question(mw.reviewer, cards[0])
+    addon._prerenderer._executor.shutdown(wait=True)
+    for card in cards[1:1 + addon.PRERENDER_AHEAD]:
+        has_answer = bool(card.note().fields[-1])
+        assert addon._question_key(
+            card.model(), 'Field 11', has_answer) in addon._question_cache
+
+
+def test_prerendering_without_typeboxes_loads_no_cards(addon, monkeypatch):
+    addon, mw, cards = addon
+    get_card = count_calls(monkeypatch, mw.col, 'getCard')
+    addon.prerenderUpcomingTypeboxes(cards[0])
+    assert get_card == []
+
+
+def test_prerendering_warm_cards_loads_no_notes(addon, monkeypatch):
+    addon, mw, cards = addon
+    addon.warmTypeboxCache()
+    addon._precompute_executor.shutdown(wait=True)
+    note = count_calls(monkeypatch, harness.Card, 'note')
+    addon.prerenderUpcomingTypeboxes(cards[0])
+    assert note == []
+    assert not addon._prerenderer._pending
+
+
+def test_several_typeboxes(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[3]
+    template = card.template()
+    template['qfmt'] += '<br>[[typebox:Field 1]]'
+    question = harness.show_question(reviewer, card)
+    assert question.count('<textarea ') == 2
+    assert question.count('id=typeans') == 1
+    # the first typebox is the one compared with its field
+    assert reviewer.typeCorrect == card.note().fields[-1]
+
+    typed = addon.html_to_text(card.note().fields[-1])
+    answer = harness.show_answer(reviewer, card, typed)
+    assert '[[typebox:' not in answer
+    # two from {{FrontSide}} and the answer template's own
+    assert answer.count('<pre class=textbox-output>') == 3
+    assert answer.count('<hr id=answer>') == 1
+
+
+def test_font_names_are_not_substitution_templates(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[4]
+    card.model()['css'] = ''
+    card.model()['flds'][-1]['font'] = r'Odd\1 Font'
+    question = harness.show_question(reviewer, card)
+    assert r"--typebox-font: 'Odd\1 Font'" in question
+
+
+def test_font_names_are_escaped(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[8]
+    card.model()['css'] = ''
+    card.model()['flds'][-1]['font'] = 'Evil"><b>'
+    question = harness.show_question(reviewer, card)
+    assert 'Evil&quot;&gt;&lt;b&gt;' in question and '<b>' not in question
+    answer = harness.show_answer(reviewer, card, 'x')
+    assert 'Evil&quot;&gt;&lt;b&gt;' in answer and '<b>' not in answer
+
+
+def test_night_mode_styling(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[9]
+    card.model()['css'] += '\n.nightMode .card { font-size: 30px; }'
+    assert '--typebox-size: 20px;' in harness.show_question(reviewer, card)
+    sys.modules['aqt.theme'].theme_manager.night_mode = True
+    assert '--typebox-size: 30px;' in harness.show_question(reviewer, card)
+    typed = addon.html_to_text(card.note().fields[-1])
+    answer = harness.show_answer(reviewer, card, typed)
+    # .textbox-output still sets the size of the answer side
+    assert '--typebox-size: 18px;' in answer
+
+
+def test_empty_answer_field_uses_fallback_font(addon):
+    addon, mw, cards = addon
+    reviewer = mw.reviewer
+    card = cards[2]
+    card.note().fields[-1] = ''
+    card.model()['css'] = ''
+    question = harness.show_question(reviewer, card)
+    last = card.model()['flds'][-1]
+    assert "--typebox-font: '%s'; --typebox-size: %spx;" % (
+        last['font'], last['size']) in question
+    assert not reviewer.typeCorrect
+
+
+def test_timing(addon, tmp_path):
+    addon, mw, cards = addon
+    timing = addon.timing
+    timing.clear()
+    harness.show_question(mw.reviewer, cards[0])
+    assert timing.samples() == []
+
+    timing.enable()
+    try:
+        for card in cards[:3]:
+            harness.show_question(mw.reviewer, card)
+            harness.show_answer(mw.reviewer, card, 'typed')
+    finally:
+        timing.disable()
+    phases = timing.percentiles()
+    for phase in ('question.regex', 'question.field lookup',
+                  'question.font resolution', 'question.html',
+                  'answer.normalization', 'answer.comparison',
+                  'answer.font resolution', 'answer.html'):
+        assert phases[phase][0] == 3
+    assert 'answer.comparison' in timing.summary()
+    path = tmp_path / 'timings.jsonl'
+    assert timing.export_jsonl(str(path)) == len(timing.samples())
+    assert path.read_text().count('\n') == len(timing.samples())
+
+
+def test_review_profile(tmp_path):
+    addon, mw = harness.load_addon(str(tmp_path),
+                                   config={'profile_reviews': True})
+    cards = harness.make_corpus(mw, n_models=1, n_rules=5, n_cards=3)
+    hooks = sys.modules['aqt.gui_hooks']
+    for card in cards:
+        harness.show_question(mw.reviewer, card)
+        harness.show_answer(mw.reviewer, card, 'typed')
+    hooks.reviewer_will_end()
+    prof, = tmp_path.joinpath('profiles').glob('review-*.prof')
+    summary = prof.with_suffix('.txt').read_text()
+    assert 'Ordered by: cumulative time' in summary
+    assert 'typeboxAnsFilter' in summary
+    profiled = {name for _, _, name in pstats.Stats(str(prof)).stats}
+    assert {'typeboxAnsQuestionFilter', 'typeboxAnsAnswerFilter',
+            'prerenderUpcomingTypeboxes', 'focusTypebox'} <= profiled
+    # nothing was profiled since
+    assert addon.dumpReviewProfile() == []
+
+    # turned off from the config
+    mw.addonManager.config_actions[harness.ADDON_NAME]({})
+    harness.show_question(mw.reviewer, cards[0])
+    assert not addon.profiling.is_enabled()
+    assert addon.dumpReviewProfile() == []
+
+
+def test_tinycss_is_imported_lazily():
+    addon, mw = harness.load_addon()
+    loaded = [name for name in sys.modules
+              if name.startswith(harness.ADDON_NAME + '.tinycss')]
+    assert loaded == []
+
+    cards = harness.make_corpus(mw, n_models=1, n_rules=1, n_cards=2)
+    cards[0].model()['css'] = ''
+    harness.show_question(mw.reviewer, cards[0])
+    assert harness.ADDON_NAME + '.tinycss' not in sys.modules
+    cards[1].model()['css'] = '.card { font-size: 30px }'
+    mw.col.models.save(cards[1].model())
+    harness.show_question(mw.reviewer, cards[1])
+    assert harness.ADDON_NAME + '.tinycss' in sys.modules
+
+
+def fastest(run, times=5):
+    """The best of a few timings of run(), which is called with the regexp
+    cache cleared so each run compiles its patterns again."""
+    timings = []
+    for _ in range(times):
+        re.purge()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def test_import_time():
+    """Loading the add-on takes less time than importing tinycss alone."""
+    # the first load also pays for standard library imports Anki has already
+    # done by the time add-ons load
+    harness.load_addon()
+    load = fastest(harness.load_addon)
+
+    def import_tinycss():
+        for name in list(sys.modules):
+            if name.startswith(harness.ADDON_NAME + '.tinycss'):
+                del sys.modules[name]
+        importlib.import_module(harness.ADDON_NAME + '.tinycss')
+    # both are timed on the same machine at about the same time, so a busy
+    # machine slows them down alike; the load is about half of this
+    assert load < fastest(import_tinycss), load
@@ -0,0 +1,45 @@
+"""
+    Tests for the stylesheet font indexes
+    -------------------------------------
+"""
+
+import tinycss
+from fonts import build_context_index, context_key
+
+CSS = '''
+.card { font-family: Arial; font-size: 20px }
+.nightMode .card { font-size: 22px }
+.card.night_mode .textbox-input { font-family: Dark }
+body.mac .card, .mobile .card { font-family: Apple }
+.win .textbox-output { font-size: 12px }
+.textbox-output { font-size: 14px }
+.card1 .card, .card > .textbox-input { font-family: Ignored }
+@media (max-width: 100px) { .card { font-size: 1px } }
+'''
+
+
+def parse(css):
+    return tinycss.make_parser('page3').parse_stylesheet(css)
+
+
+def test_context_index():
+    index = build_context_index(parse(CSS))
+    assert len(index) == 12
+    assert index[context_key(False, 'linux')] == {
+        '.card': {'font-family': 'Arial', 'font-size': '20'},
+        '.textbox-output': {'font-size': '14'},
+    }
+    night = index[context_key(True, 'linux')]
+    assert night['.card'] == {'font-family': 'Arial', 'font-size': '22'}
+    assert night['.textbox-input'] == {'font-family': 'Dark'}
+    assert index[context_key(False, 'mac')]['.card']['font-family'] == 'Apple'
+    assert index[context_key(False, 'linux', True)]['.card'][
+        'font-family'] == 'Apple'
+    # more specific, so it wins although it comes first
+    assert index[context_key(False, 'win')]['.textbox-output'] == {
+        'font-size': '12'}
+
+
+def test_context_key():
+    assert context_key(True, 'mac', True) == 'mac mobile nightMode'
+    assert context_key(False, 'win') == 'win'
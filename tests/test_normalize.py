@@ -0,0 +1,111 @@
+"""
+    Tests for the correct answer normalizer
+    ---------------------------------------
+
+    html_to_text is compared against the chain of regex substitutions,
+    stripHTML and html.unescape the answer filter used before it.
+"""
+
+import html
+import random
+import re
+from html.entities import name2codepoint
+
+import pytest
+from normalize import html_to_text
+
+# anki.utils.stripHTML, as shipped with the Anki versions this add-on targets
+reComment = re.compile("(?s)<!--.*?-->")
+reStyle = re.compile("(?si)<style.*?>.*?</style>")
+reScript = re.compile("(?si)<script.*?>.*?</script>")
+reTag = re.compile("(?s)<.*?>")
+reEnts = re.compile(r"&#?\w+;")
+
+
+def entsToTxt(html):
+    html = html.replace("&nbsp;", " ")
+
+    def fixup(m):
+        text = m.group(0)
+        if text[:2] == "&#":
+            try:
+                if text[:3] == "&#x":
+                    return chr(int(text[3:-1], 16))
+                else:
+                    return chr(int(text[2:-1]))
+            except ValueError:
+                pass
+        else:
+            try:
+                text = chr(name2codepoint[text[1:-1]])
+            except KeyError:
+                pass
+        return text
+
+    return reEnts.sub(fixup, html)
+
+
+def stripHTML(s):
+    s = reComment.sub("", s)
+    s = reStyle.sub("", s)
+    s = reScript.sub("", s)
+    s = reTag.sub("", s)
+    s = entsToTxt(s)
+    return s
+
+
+def reference_html_to_text(cor):
+    newline_marker = "__typeboxnewline__"
+    cor = re.sub(r"(<div><br>|<br>)", newline_marker, cor)
+    cor = re.sub(r"(<div>)+", newline_marker, cor)
+    cor = re.sub(r"(\r\n|\n)", newline_marker, cor)
+    cor = stripHTML(cor)
+    cor = html.unescape(cor)
+    cor = cor.replace("\xa0", " ")
+    cor = cor.replace(newline_marker, "\n")
+    cor = cor.strip()
+    return cor
+
+
+FRAGMENTS = [
+    '<div>', '</div>', '<br>', '<div><br>', '<br/>', '<BR>', '<b>', '</b>',
+    '<span style="color: red">', '</span>', '<img src="a.png">', '<a b="<br>">',
+    '<table><tr><td>', '</td></tr></table>', '<!-- note -->', '<!--',
+    '-->', '<style>p { color: red }</style>', '<STYLE>', '</style>',
+    '<script>x < y</script>', '<script>', '\n', '\r\n', '\r', ' ', '  ',
+    '\t', '\xa0', '&nbsp;', '&amp;', '&lt;', '&gt;', '&amp;lt;', '&#65;',
+    '&#x42;', '&#xZZ;', '&bogus;', '&amp', '&lt', '&', ';', '<', '>', '=',
+    'a', 'word', 'def f(x):', '    return x', 'é', '日本',
+]
+
+
+def test_examples():
+    assert html_to_text('') == ''
+    assert html_to_text('plain') == 'plain'
+    assert html_to_text('a<br>b<div>c</div><div><br></div>d') == 'a\nb\nc\nd'
+    assert html_to_text('<b>x &lt; y</b>&nbsp;') == 'x < y'
+    assert html_to_text('if a <br><div><div><br></div></div>') == 'if a'
+    assert html_to_text('a<div><div><br></div></div>b') == 'a\n\nb'
+    assert html_to_text('1 < 2 and 3 > 2') == '1  2'
+    assert html_to_text('<!-- c --><div>x</div>') == 'x'
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_previous_pipeline(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        field = ''.join(
+            rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 30)))
+        assert html_to_text(field) == reference_html_to_text(field), field
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_previous_pipeline_without_blocks(seed):
+    # most fields have no comments, <style> or <script> blocks
+    fragments = [f for f in FRAGMENTS
+                 if not re.search('<(!--|style|script)', f, re.I)]
+    rng = random.Random(seed)
+    for _ in range(200):
+        field = ''.join(
+            rng.choice(fragments) for _ in range(rng.randint(0, 60)))
+        assert html_to_text(field) == reference_html_to_text(field), field
@@ -0,0 +1,70 @@
+"""
+    Tests for the on-disk stylesheet cache
+    --------------------------------------
+"""
+
+import sqlite3
+import sys
+
+import harness
+from persist import SCHEMA_VERSION, StyleStore
+
+CSS = '.card { font-size: 20px }'
+INDEX = {'.card': {'font-size': '20'}}
+
+
+def test_get_and_put(tmp_path):
+    store = StyleStore(str(tmp_path / 'user_files' / 'cache.sqlite'))
+    assert store.get(1, CSS) is None
+    store.put(1, CSS, INDEX)
+    assert store.get(1, CSS) == INDEX
+    # a changed stylesheet misses, and replaces the old entry
+    assert store.get(1, CSS + ' ') is None
+    store.put(1, CSS + ' ', {})
+    assert store.get(1, CSS) is None
+    store.close()
+    assert StyleStore(store.path).get(1, CSS + ' ') == {}
+
+
+def test_corrupt_file_is_replaced(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    path.write_bytes(b'this is not a database' * 100)
+    store = StyleStore(str(path))
+    assert store.get(1, CSS) is None
+    store.put(1, CSS, INDEX)
+    assert store.get(1, CSS) == INDEX
+
+
+def test_old_versions_are_cleared(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    store = StyleStore(path)
+    store.put(1, CSS, INDEX)
+    store.close()
+    db = sqlite3.connect(path)
+    db.execute('pragma user_version = %d' % (SCHEMA_VERSION - 1))
+    db.commit()
+    db.close()
+    assert StyleStore(path).get(1, CSS) is None
+
+
+def test_unusable_location_disables_store(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    store = StyleStore(str(blocker / 'cache.sqlite'))
+    assert store.get(1, CSS) is None
+    store.put(1, CSS, INDEX)
+    assert store.get(1, CSS) is None
+
+
+def test_restart_does_not_reparse(tmp_path):
+    user_files = str(tmp_path)
+    addon, mw = harness.load_addon(user_files)
+    cards = harness.make_corpus(mw, n_models=1, n_rules=5, n_cards=1)
+    first = harness.show_question(mw.reviewer, cards[0])
+    addon._prerenderer._executor.shutdown(wait=True)
+    sys.modules['aqt.gui_hooks'].profile_will_close()
+
+    addon, mw = harness.load_addon(user_files)
+    cards = harness.make_corpus(mw, n_models=1, n_rules=5, n_cards=1)
+    assert harness.show_question(mw.reviewer, cards[0]) == first
+    assert harness.ADDON_NAME + '.tinycss' not in sys.modules
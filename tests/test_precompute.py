@@ -0,0 +1,148 @@
+"""
+    Tests for warming the typebox caches of a whole collection
+    ----------------------------------------------------------
+"""
+
+import json
+import random
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import harness
+import pytest
+from precompute import note_types_from_collection_file, typebox_fields
+
+PATTERN = r'\[\[typebox:(.*?)\]\]'
+
+
+def write_collection(path, models):
+    db = sqlite3.connect(str(path))
+    db.execute('create table col (id integer primary key, models text)')
+    db.execute('insert into col values (1, ?)', (json.dumps(
+        {str(m['id']): m for m in models}),))
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def models():
+    rng = random.Random(0)
+    models = [harness.make_model(mid, 4, 10, rng) for mid in (1, 2, 3)]
+    # a note type without typebox
+    models[2]['tmpls'][0]['qfmt'] = '{{Field 0}} [[type:Field 3]]'
+    return models
+
+
+def test_typebox_fields(models):
+    assert typebox_fields(models[0], PATTERN) == ['Field 3']
+    assert typebox_fields(models[2], PATTERN) == []
+
+
+def test_warm_from_collection_file(tmp_path, models):
+    path = tmp_path / 'collection.anki2'
+    write_collection(path, models)
+    read = note_types_from_collection_file(str(path))
+    assert [m['id'] for m in read] == [1, 2, 3]
+
+    addon, mw = harness.load_addon()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = addon.precompute.warm(
+            read, addon._render_question, PATTERN, executor)
+        wait(futures)
+    assert [f.result() for f in futures] == [1, 1]
+    for model in read[:2]:
+        for has_answer in (True, False):
+            assert addon._question_key(model, 'Field 3', has_answer) in (
+                addon._question_cache)
+    assert len(addon._question_cache) == 4
+
+
+def varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def message(*fields):
+    """Serialize (number, value) pairs as a protobuf message."""
+    out = b''
+    for number, value in fields:
+        if isinstance(value, int):
+            out += varint(number << 3) + varint(value)
+        else:
+            data = value.encode('utf-8')
+            out += varint(number << 3 | 2) + varint(len(data)) + data
+    return out
+
+
+def write_notetype_tables(path, models):
+    """A collection in the layout of Anki 2.1.28 and later."""
+    db = sqlite3.connect(str(path))
+    db.execute('create table col (id integer primary key, models text)')
+    db.execute('create table notetypes (id integer primary key, name text,'
+               ' mtime_secs integer, usn integer, config blob)')
+    db.execute('create table fields (ntid integer, ord integer, name text,'
+               ' config blob)')
+    db.execute('create table templates (ntid integer, ord integer,'
+               ' name text, mtime_secs integer, usn integer, config blob)')
+    db.execute("insert into col values (1, '')")
+    for m in models:
+        # kind, sort field and a 64-bit fixed field that isn't read
+        config = message((1, 0), (3, m['css']), (2, 1)) + (
+            varint(4 << 3 | 1) + bytes(8))
+        db.execute('insert into notetypes values (?, ?, ?, 0, ?)',
+                   (m['id'], m['name'], m['mod'], config))
+        for f in m['flds']:
+            db.execute('insert into fields values (?, ?, ?, ?)', (
+                m['id'], f['ord'], f['name'],
+                message((1, 1), (3, f['font']), (4, f['size']),
+                        (255, 'other'))))
+        for ord, t in enumerate(m['tmpls']):
+            db.execute('insert into templates values (?, ?, ?, 0, 0, ?)', (
+                m['id'], ord, t['name'],
+                message((1, t['qfmt']), (2, t['afmt']), (7, 12))))
+    db.commit()
+    db.close()
+
+
+def test_read_from_notetype_tables(tmp_path, models):
+    path = tmp_path / 'collection.anki2'
+    models[0]['flds'][1]['font'] = 'Ünïcode Sans'
+    write_notetype_tables(path, models)
+    read = note_types_from_collection_file(str(path))
+    assert [m['id'] for m in read] == [1, 2, 3]
+    for model, original in zip(read, models):
+        for key in ('id', 'mod', 'name', 'css', 'flds'):
+            assert model[key] == original[key], key
+        assert [(t['name'], t['qfmt'], t['afmt']) for t in model['tmpls']] == [
+            (t['name'], t['qfmt'], t['afmt']) for t in original['tmpls']]
+    assert [typebox_fields(m, PATTERN) for m in read] == [
+        ['Field 3'], ['Field 3'], []]
+
+    addon, mw = harness.load_addon()
+    assert addon.precompute.warm(read, addon._render_question, PATTERN) == [
+        1, 1]
+
+
+def test_unknown_files_are_rejected(tmp_path):
+    path = tmp_path / 'collection.anki2'
+    db = sqlite3.connect(str(path))
+    db.execute('create table cards (id integer primary key)')
+    db.close()
+    with pytest.raises(ValueError):
+        note_types_from_collection_file(str(path))
+
+
+def test_warm_on_profile_open():
+    addon, mw = harness.load_addon()
+    harness.make_corpus(mw, n_models=3, n_rules=5, n_cards=3)
+    sys.modules['aqt.gui_hooks'].profile_did_open()
+    addon._precompute_executor.shutdown(wait=True)
+    assert len(addon._question_cache) == 6
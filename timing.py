@@ -0,0 +1,116 @@
+"""
+Opt-in timing of the phases of the typebox filters.
+
+From Anki's debug console:
+
+	timing = __import__("681236951").timing  # the add-on's folder name
+	timing.enable()
+	... review some cards ...
+	print(timing.summary())
+	timing.export_jsonl("/tmp/typebox-timings.jsonl")
+
+Samples go into a fixed-size ring buffer, so leaving it on costs no memory
+over time. Phases recorded by the filters:
+
+	question.regex, question.field lookup, question.font resolution,
+	question.html, answer.normalization, answer.comparison,
+	answer.font resolution, answer.html, css parse
+
+"css parse" is only recorded when a stylesheet isn't cached yet, and is also
+part of the font resolution phase it happens in.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+
+RING_SIZE = 4096
+
+_enabled = False
+_samples = deque(maxlen=RING_SIZE)
+_lock = threading.Lock()
+_perf_counter = time.perf_counter
+
+
+def enable(ring_size: int = RING_SIZE) -> None:
+	global _enabled, _samples
+	with _lock:
+		if _samples.maxlen != ring_size:
+			_samples = deque(_samples, maxlen=ring_size)
+	_enabled = True
+
+
+def disable() -> None:
+	global _enabled
+	_enabled = False
+
+
+def is_enabled() -> bool:
+	return _enabled
+
+
+def clear() -> None:
+	with _lock:
+		_samples.clear()
+
+
+def clock() -> float:
+	"""Start timing a phase; returns 0 when timing is off."""
+	return _perf_counter() if _enabled else 0.0
+
+
+def lap(phase: str, start: float) -> float:
+	"""
+	Record the time since `start` for `phase`, and return the current time so
+	it can start the next phase.
+	"""
+	if not _enabled:
+		return 0.0
+	now = _perf_counter()
+	if start:
+		with _lock:
+			_samples.append((time.time(), phase, now - start))
+	return now
+
+
+def samples() -> list:
+	"""The recorded (unix time, phase, seconds) samples, oldest first."""
+	with _lock:
+		return list(_samples)
+
+
+def _percentile(sorted_values, p):
+	index = min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))))
+	return sorted_values[index]
+
+
+def percentiles(percents=(50, 90, 99, 100)) -> dict:
+	"""Map each phase to (sample count, {percent: seconds})."""
+	by_phase = {}
+	for _, phase, seconds in samples():
+		by_phase.setdefault(phase, []).append(seconds)
+	result = {}
+	for phase, values in by_phase.items():
+		values.sort()
+		result[phase] = (len(values), {p: _percentile(values, p) for p in percents})
+	return result
+
+
+def summary() -> str:
+	lines = ["%-26s %6s %10s %10s %10s %10s" % ("phase", "n", "p50 ms", "p90 ms", "p99 ms", "max ms")]
+	for phase, (count, values) in sorted(percentiles().items()):
+		lines.append(
+			"%-26s %6d %10.3f %10.3f %10.3f %10.3f"
+			% (phase, count, *(values[p] * 1000 for p in (50, 90, 99, 100)))
+		)
+	return "\n".join(lines)
+
+
+def export_jsonl(path: str) -> int:
+	"""Write the samples to `path` as JSON lines; returns how many were written."""
+	recorded = samples()
+	with open(path, "w", encoding="utf-8") as f:
+		for timestamp, phase, seconds in recorded:
+			f.write(json.dumps({"time": timestamp, "phase": phase, "seconds": seconds}) + "\n")
+	return len(recorded)
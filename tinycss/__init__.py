@@ -24,6 +24,14 @@ PARSER_MODULES = {
 }
 
 
+# Generated parser classes, keyed by their tuple of base classes.
+_PARSER_CLASSES = {}
+
+# Shared instances of parsers built only from the bundled parser classes.
+# These parsers hold no state, so one instance per class is enough.
+_SHARED_PARSERS = {}
+
+
 def make_parser(*features, **kwargs):
     """Make a parser object with the chosen features.
 
@@ -38,10 +46,25 @@ def make_parser(*features, **kwargs):
     :returns:
         An instance of a new subclass of :class:`CSS21Parser`
 
+    The generated subclass is created once per combination of features and
+    reused afterwards. When only bundled features are requested and no
+    keyword arguments are given, the same parser instance is returned.
+
     """
     if features:
         bases = tuple(PARSER_MODULES.get(f, f) for f in features)
-        parser_class = type('CustomCSSParser', bases + (CSS21Parser,), {})
+        parser_class = _PARSER_CLASSES.get(bases)
+        if parser_class is None:
+            parser_class = type(
+                'CustomCSSParser', bases + (CSS21Parser,), {})
+            _PARSER_CLASSES[bases] = parser_class
+        builtin = all(base in PARSER_MODULES.values() for base in bases)
     else:
         parser_class = CSS21Parser
-    return parser_class(**kwargs)
+        builtin = True
+    if kwargs or not builtin:
+        return parser_class(**kwargs)
+    parser = _SHARED_PARSERS.get(parser_class)
+    if parser is None:
+        parser = _SHARED_PARSERS[parser_class] = parser_class()
+    return parser
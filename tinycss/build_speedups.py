@@ -0,0 +1,56 @@
+# coding: utf-8
+"""
+    Build tinycss.speedups in place
+    -------------------------------
+
+    The Cython speedups are optional: without them the pure-Python
+    tokenizers are used. To build them for this machine, with Cython and a C
+    compiler installed, run::
+
+        python tinycss/build_speedups.py
+
+    from the directory that contains the ``tinycss`` package. The extension
+    is written next to ``speedups.pyx``, with the platform's extension
+    suffix (eg. ``speedups.cpython-311-x86_64-linux-gnu.so``), so it is
+    picked up before any prebuilt ``speedups.so`` for another platform.
+
+    :copyright: (c) 2012 by Simon Sapin.
+    :license: BSD, see LICENSE for more details.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build():
+    os.chdir(os.path.dirname(PACKAGE_DIR))
+    package = os.path.basename(PACKAGE_DIR)
+    build_temp = tempfile.mkdtemp(prefix='tinycss-build-')
+    try:
+        setup(
+            name='tinycss-speedups',
+            script_args=[
+                'build_ext', '--inplace',
+                '--build-temp', os.path.join(build_temp, 'temp'),
+                '--build-lib', os.path.join(build_temp, 'lib')],
+            ext_modules=cythonize(
+                [Extension(package + '.speedups',
+                           [os.path.join(package, 'speedups.pyx')])],
+                build_dir=os.path.join(build_temp, 'c'),
+                compiler_directives={'language_level': 3}),
+        )
+    finally:
+        shutil.rmtree(build_temp)
+
+
+if __name__ == '__main__':
+    if hasattr(sys, 'pypy_translation_info'):
+        sys.exit('The speedups are not used on PyPy.')
+    build()
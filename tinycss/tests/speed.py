@@ -4,7 +4,12 @@
     -----------
 
     Note: this file is not named test_*.py as it is not part of the
-    test suite ran by pytest.
+    test suite ran by pytest. Run it from the directory that contains the
+    ``tinycss`` package with::
+
+        python -m tinycss.tests.speed
+
+    cssutils is also timed when it is installed.
 
     :copyright: (c) 2012 by Simon Sapin.
     :license: BSD, see LICENSE for more details.
@@ -16,10 +21,14 @@ from __future__ import division, unicode_literals
 import contextlib
 import functools
 import os.path
+import random
 import sys
 import timeit
 
-from cssutils import parseString
+try:
+    from cssutils import parseString
+except ImportError:
+    parseString = None
 
 from .. import tokenizer
 from ..css21 import CSS21Parser
@@ -30,11 +39,45 @@ TIMEIT_REPEAT = 3
 TIMEIT_NUMBER = 20
 
 
+def generate_css(n_rules=150, seed=0):
+    """A stylesheet with the usual mix of selectors, comments, strings,
+    URIs, dimensions and escapes, for when no real one is around."""
+    rng = random.Random(seed)
+    properties = [
+        'margin: {0}px auto', 'padding: {0}px {1}em', 'color: #{2:06x}',
+        'font-family: "Liberation Sans", Arial, sans-serif',
+        'font-size: {3}%', 'background: url(images/bg-{0}.png) no-repeat',
+        'content: "\\201C  quoted {0}"', 'width: calc(100% - {0}px)',
+        'border: {4}px solid rgba({0}, {1}, 255, 0.{1})',
+        'line-height: 1.{1}', 'z-index: {0} !important']
+    selectors = [
+        '.rule-{0}', '#id-{0} > p', 'ul li:hover a.link-{0}',
+        '.card .textbox-output-{0}', 'div[data-x="{0}"]', '.\\31 0-{0}']
+    rules = []
+    for i in range(n_rules):
+        if i % 25 == 0:
+            rules.append('/* section {0} */'.format(i))
+        selector = ', '.join(
+            rng.choice(selectors).format(i) for _ in range(rng.randint(1, 3)))
+        declarations = ';\n    '.join(
+            rng.choice(properties).format(
+                rng.randint(0, 99), rng.randint(0, 9),
+                rng.randrange(1 << 24), rng.randint(50, 200),
+                rng.randint(1, 4))
+            for _ in range(rng.randint(1, 6)))
+        rules.append('{0} {{\n    {1};\n}}'.format(selector, declarations))
+    return '\n'.join(rules).encode('utf-8')
+
+
 def load_css():
     filename = os.path.join(os.path.dirname(__file__),
                             '..', '..', 'docs', '_static', 'custom.css')
-    with open(filename, 'rb') as fd:
-        return b'\n'.join([fd.read()] * CSS_REPEAT)
+    if os.path.exists(filename):
+        with open(filename, 'rb') as fd:
+            css = fd.read()
+    else:
+        css = generate_css()
+    return b'\n'.join([css] * CSS_REPEAT)
 
 
 # Pre-load so that I/O is not measured
@@ -65,6 +108,7 @@ def parse(tokenizer_name):
 
 parse_cython = functools.partial(parse, 'cython_tokenize_flat')
 parse_python = functools.partial(parse, 'python_tokenize_flat')
+parse_regex = functools.partial(parse, 'regex_tokenize_flat')
 
 
 def parse_cssutils():
@@ -84,7 +128,9 @@ def check_consistency():
     assert len(result) > 0
     if tokenizer.cython_tokenize_flat:
         assert parse_cython() == result
-    assert parse_cssutils() == result
+    assert parse_regex() == result
+    if parseString is not None:
+        assert parse_cssutils() == result
     version = '.'.join(map(str, sys.version_info[:3]))
     print('Python {}, consistency OK.'.format(version))
 
@@ -96,7 +142,9 @@ def warm_up():
         for i in range(80):
             for i in range(10):
                 parse_python()
-                parse_cssutils()
+                parse_regex()
+                if parseString is not None:
+                    parse_cssutils()
             sys.stdout.write('.')
             sys.stdout.flush()
         sys.stdout.write('\n')
@@ -117,9 +165,13 @@ def run():
         print('Speedups are NOT available.')
         data_set = []
     data_set += [
+        ('tinycss single regexp   ', parse_regex),
         ('tinycss WITHOUT speedups', parse_python),
-        ('cssutils                ', parse_cssutils),
     ]
+    if parseString is not None:
+        data_set.append(('cssutils                ', parse_cssutils))
+    else:
+        print('cssutils is NOT installed.')
     label, function = data_set.pop(0)
     ref = time(function)
     print('{}  {} ms'.format(label, ref))
@@ -43,3 +43,20 @@ def test_make_parser():
     raises(TypeError, make_parser, 'page3', some_config=4)
     raises(TypeError, make_parser, MyParser)
     raises(TypeError, make_parser, MyParser, some_config=4, other_config=7)
+
+
+def test_make_parser_reuses_classes():
+    class MyParser(object):
+        def __init__(self, some_config):
+            self.some_config = some_config
+
+    assert make_parser('page3') is make_parser('page3')
+    assert make_parser() is make_parser()
+    assert make_parser('page3') is not make_parser('fonts3')
+    assert type(make_parser('page3')) is type(make_parser(CSSPage3Parser))
+
+    first = make_parser(MyParser, 'page3', some_config=1)
+    second = make_parser(MyParser, 'page3', some_config=2)
+    assert first is not second
+    assert type(first) is type(second)
+    assert (first.some_config, second.some_config) == (1, 2)
@@ -11,14 +11,20 @@
 from __future__ import unicode_literals
 
 import os
+import random
 import sys
 
 import pytest
+from tinycss.token_data import ContainerToken, SourceLines, Token
 from tinycss.tokenizer import (
-    cython_tokenize_flat, python_tokenize_flat, regroup)
+    HAS_SPEEDUPS, cython_tokenize_flat, python_tokenize_flat,
+    regex_tokenize_flat, regroup, tokenize_flat)
 
 
 def test_speedups():
+    assert HAS_SPEEDUPS == (cython_tokenize_flat is not None)
+    if HAS_SPEEDUPS:
+        assert tokenize_flat is cython_tokenize_flat
     is_pypy = hasattr(sys, 'pypy_translation_info')
     env_skip_tests = os.environ.get('TINYCSS_SKIP_SPEEDUPS_TESTS')
     # pragma: no cover
@@ -32,7 +38,8 @@ def test_speedups():
 
 @pytest.mark.parametrize(('tokenize', 'css_source', 'expected_tokens'), [
     (tokenize,) + test_data
-    for tokenize in (python_tokenize_flat, cython_tokenize_flat)
+    for tokenize in (python_tokenize_flat, regex_tokenize_flat,
+                     cython_tokenize_flat)
     for test_data in [
         ('', []),
         ('red -->', [('IDENT', 'red'), ('S', ' '), ('CDC', '-->')]),
@@ -138,7 +145,7 @@ def test_tokens(tokenize, css_source, expected_tokens):
 
 
 @pytest.mark.parametrize('tokenize', [
-    python_tokenize_flat, cython_tokenize_flat])
+    python_tokenize_flat, regex_tokenize_flat, cython_tokenize_flat])
 def test_positions(tokenize):
     """Test the reported line/column position of each token."""
     if tokenize is None:  # pragma: no cover
@@ -153,11 +160,52 @@ def test_positions(tokenize):
         ('S', 4, 11), ('IDENT', 4, 12), (';', 4, 15), ('S', 4, 16),
         ('IDENT', 4, 17), (':', 4, 24), ('S', 4, 25), ('STRING', 4, 26),
         ('S', 5, 5), ('}', 5, 6)]
+    assert [token.offset for token in tokens] == [
+        0, 17, 18, 19, 20, 21, 26, 31, 32, 33, 36, 37,
+        38, 45, 46, 47, 59, 60]
+
+
+@pytest.mark.parametrize('tokenize', [
+    python_tokenize_flat, regex_tokenize_flat, cython_tokenize_flat])
+def test_grouped_positions(tokenize):
+    """Container tokens start where their opening token does."""
+    if tokenize is None:  # pragma: no cover
+        pytest.skip('Speedups not available')
+    css = 'a {\r\n  b: f(\n[c])}'
+    block, = [token for token in regroup(tokenize(css)) if token.is_container]
+    function = block.content[4]
+    bracket = function.content[1]
+    assert (block.type, block.line, block.column, block.offset) == (
+        '{', 1, 3, 2)
+    assert (function.function_name, function.line, function.column) == (
+        'f', 2, 6)
+    assert (bracket.type, bracket.line, bracket.column) == ('[', 3, 1)
+
+
+def test_explicit_positions():
+    """Tokens can still be given their line and column directly."""
+    token = Token('IDENT', 'red', 'red', None, 3, 7)
+    assert (token.line, token.column, token.offset) == (3, 7, None)
+    container = ContainerToken('(', '(', ')', [token], 2, 4)
+    assert (container.line, container.column) == (2, 4)
+    assert regroup([
+        Token('(', '(', '(', None, 5, 6), token,
+        Token(')', ')', ')', None, 5, 10)
+    ]).__next__().line == 5
+
+
+def test_source_lines():
+    lines = SourceLines('a\r\nb\n\nc\fd\re')
+    assert lines.starts == [0, 3, 5, 6, 8, 10]
+    assert [lines.position(offset) for offset in range(11)] == [
+        (1, 1), (1, 2), (1, 3), (2, 1), (2, 2), (3, 1), (4, 1), (4, 2),
+        (5, 1), (5, 2), (6, 1)]
 
 
 @pytest.mark.parametrize(('tokenize', 'css_source', 'expected_tokens'), [
     (tokenize,) + test_data
-    for tokenize in (python_tokenize_flat, cython_tokenize_flat)
+    for tokenize in (python_tokenize_flat, regex_tokenize_flat,
+                     cython_tokenize_flat)
     for test_data in [
         ('', []),
         (r'Lorem\26 "i\psum"4px', [
@@ -236,7 +284,8 @@ def jsonify(tokens):
 
 @pytest.mark.parametrize(('tokenize', 'ignore_comments', 'expected_tokens'), [
     (tokenize,) + test_data
-    for tokenize in (python_tokenize_flat, cython_tokenize_flat)
+    for tokenize in (python_tokenize_flat, regex_tokenize_flat,
+                     cython_tokenize_flat)
     for test_data in [
         (False, [
             ('COMMENT', '/* lorem */'),
@@ -267,7 +316,8 @@ def test_comments(tokenize, ignore_comments, expected_tokens):
 
 @pytest.mark.parametrize(('tokenize', 'css_source'), [
     (tokenize, test_data)
-    for tokenize in (python_tokenize_flat, cython_tokenize_flat)
+    for tokenize in (python_tokenize_flat, regex_tokenize_flat,
+                     cython_tokenize_flat)
     for test_data in [
         r'p[example="foo(int x) {    this.x = x;}"]',
         '"Lorem\\26Ipsum\ndolor" sit',
@@ -287,7 +337,8 @@ def test_token_serialize_css(tokenize, css_source):
 
 @pytest.mark.parametrize(('tokenize', 'css_source'), [
     (tokenize, test_data)
-    for tokenize in (python_tokenize_flat, cython_tokenize_flat)
+    for tokenize in (python_tokenize_flat, regex_tokenize_flat,
+                     cython_tokenize_flat)
     for test_data in [
         '(8, foo, [z])', '[8, foo, (z)]', '{8, foo, [z]}', 'func(8, foo, [z])'
     ]
@@ -300,3 +351,29 @@ def test_token_api(tokenize, css_source):
     token = tokens[0]
     expected_len = 7  # 2 spaces, 2 commas, 3 others.
     assert len(token.content) == expected_len
+
+
+@pytest.mark.parametrize('tokenize', [
+    regex_tokenize_flat, cython_tokenize_flat])
+@pytest.mark.parametrize('seed', range(10))
+def test_tokenizer_matches_python(tokenize, seed):
+    """The other tokenizers give the same tokens on random input."""
+    if tokenize is None:  # pragma: no cover
+        pytest.skip('Speedups not available')
+    pieces = list('ab-_\\"\'/*(){}[]:;@#.%+059 \n\r\f\tuUeE<>!,=~\xe9\x80') + [
+        'url(', '/*', '*/', '\\\n', '\\41 ', '-->', '<!--', 'u+1F-2f',
+        '1e', '\r\n', 'px', '\\\r\n']
+    rng = random.Random(seed)
+    for _ in range(300):
+        css_source = ''.join(
+            rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+        for ignore_comments in (True, False):
+            expected = python_tokenize_flat(css_source, ignore_comments)
+            tokens = tokenize(css_source, ignore_comments)
+            assert [
+                (t.type, t.as_css(), t.value, t.unit, t.line, t.column)
+                for t in tokens
+            ] == [
+                (t.type, t.as_css(), t.value, t.unit, t.line, t.column)
+                for t in expected
+            ], css_source
@@ -13,6 +13,7 @@ from __future__ import unicode_literals
 
 import functools
 import operator
+from bisect import bisect_right
 import re
 import string
 import sys
@@ -122,6 +123,30 @@ COMPILED_TOKEN_INDEXES = {}  # {name: i}  helper for the C speedups
 TOKEN_DISPATCH = []
 
 
+# All tokens in one regexp, for the single regexp tokenizer. The alternatives
+# are capturing groups, and the groups of a token's own regexp follow the
+# group of its alternative.
+# They come in this order, most common first. Tokens that can start with the
+# same character (all those in TOKEN_DISPATCH for that character) keep their
+# order from TOKENS, so the first alternative that matches is the longest.
+MASTER_TOKEN_ORDER = [
+    'S', ':', ';', '{', '}', '(', ')', '[', ']',
+    'URI', 'BAD_URI', 'UNICODE-RANGE', 'IDENT', 'NUMBER',
+    'HASH', 'STRING', 'BAD_STRING', 'ATKEYWORD', 'COMMENT', 'BAD_COMMENT',
+    'CDO', 'CDC',
+]
+# FUNCTION is an IDENT followed by (, and DIMENSION and PERCENTAGE are a
+# NUMBER followed by an identifier or %: the IDENT and NUMBER alternatives
+# match those too, so the common part is only scanned once, and the groups
+# below tell them apart.
+MASTER_TOKEN_SOURCES = {
+    'IDENT': r'{ident}(?P<function>\()?',
+    'NUMBER': r'({num})(?:(?P<unit>{ident})|(?P<percent>%))?',
+}
+MASTER_TOKEN_REGEXP = None
+MASTER_TOKEN_TYPES = {}  # {alternative's group index: name}
+
+
 try:
     unichr
 except NameError:
@@ -132,6 +157,7 @@ except NameError:
 
 def _init():
     """Import-time initialization."""
+    global MASTER_TOKEN_REGEXP
     COMPILED_MACROS.clear()
     for line in MACROS.splitlines():
         if line.strip():
@@ -139,21 +165,38 @@ def _init():
             COMPILED_MACROS[name.strip()] = '(?:%s)' \
                 % value.format(**COMPILED_MACROS)
 
+    token_sources = [
+        (name.strip(), value.format(**COMPILED_MACROS))
+        for line in TOKENS.splitlines()
+        if line.strip()
+        for name, value in [line.split('\t')]
+    ]
     COMPILED_TOKEN_REGEXPS[:] = (
         (
-            name.strip(),
+            name,
             re.compile(
-                value.format(**COMPILED_MACROS),
+                source,
                 # Case-insensitive when matching eg. uRL(foo)
                 # but preserve the case in extracted groups
                 re.I
             ).match
         )
-        for line in TOKENS.splitlines()
-        if line.strip()
-        for name, value in [line.split('\t')]
+        for name, source in token_sources
     )
 
+    MASTER_TOKEN_TYPES.clear()
+    alternatives = []
+    group = 1
+    token_sources = dict(token_sources)
+    for name, value in MASTER_TOKEN_SOURCES.items():
+        token_sources[name] = value.format(**COMPILED_MACROS)
+    for name in MASTER_TOKEN_ORDER:
+        source = token_sources[name]
+        MASTER_TOKEN_TYPES[group] = name
+        alternatives.append('(%s)' % source)
+        group += 1 + re.compile(source).groups
+    MASTER_TOKEN_REGEXP = re.compile('|'.join(alternatives), re.I)
+
     COMPILED_TOKEN_INDEXES.clear()
     for i, (name, regexp) in enumerate(COMPILED_TOKEN_REGEXPS):
         COMPILED_TOKEN_INDEXES[name] = i
@@ -212,6 +255,27 @@ SIMPLE_UNESCAPE = functools.partial(
 FIND_NEWLINES = re.compile(COMPILED_MACROS['nl']).finditer
 
 
+class SourceLines(object):
+    """Where the lines of a CSS source start.
+
+    Built once per source by the tokenizers, so that tokens only need to
+    keep their offset: their line and column are looked up when asked for.
+
+    """
+    __slots__ = 'starts',
+
+    def __init__(self, css_source):
+        starts = [0]
+        starts.extend(match.end() for match in FIND_NEWLINES(css_source))
+        #: Offsets of the first character of each line.
+        self.starts = starts
+
+    def position(self, offset):
+        """Return the ``(line, column)`` of an offset, both starting at 1."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+
 class Token(object):
     """A single atomic token.
 
@@ -305,17 +369,38 @@ class Token(object):
 
         The column number (inside a source line) of the start of this token.
 
+    .. attribute:: offset
+
+        The index in the CSS source of the start of this token, or ``None``
+        if the token was given its line and column directly.
+
     """
     is_container = False
-    __slots__ = 'type', '_as_css', 'value', 'unit', 'line', 'column'
+    __slots__ = 'type', '_as_css', 'value', 'unit', 'offset', '_lines', \
+        '_position'
 
-    def __init__(self, type_, css_value, value, unit, line, column):
+    def __init__(self, type_, css_value, value, unit, line=None, column=None,
+                 offset=None, lines=None):
         self.type = type_
         self._as_css = css_value
         self.value = value
         self.unit = unit
-        self.line = line
-        self.column = column
+        self.offset = offset
+        # line and column are only worked out from the offset when needed
+        self._lines = lines
+        self._position = None if lines is not None else (line, column)
+
+    @property
+    def line(self):
+        if self._position is None:
+            self._position = self._lines.position(self.offset)
+        return self._position[0]
+
+    @property
+    def column(self):
+        if self._position is None:
+            self._position = self._lines.position(self.offset)
+        return self._position[1]
 
     def as_css(self):
         """
@@ -373,18 +458,30 @@ class ContainerToken(object):
 
         The column number (inside a source line) of the start of this token.
 
+    .. attribute:: offset
+
+        The index in the CSS source of the start of this token, or ``None``
+        if the token was given its line and column directly.
+
     """
     is_container = True
     unit = None
-    __slots__ = 'type', '_css_start', '_css_end', 'content', 'line', 'column'
+    __slots__ = 'type', '_css_start', '_css_end', 'content', 'offset', \
+        '_lines', '_position'
 
-    def __init__(self, type_, css_start, css_end, content, line, column):
+    def __init__(self, type_, css_start, css_end, content, line=None,
+                 column=None, offset=None, lines=None):
         self.type = type_
         self._css_start = css_start
         self._css_end = css_end
         self.content = content
-        self.line = line
-        self.column = column
+        self.offset = offset
+        self._lines = lines
+        self._position = None if lines is not None else (line, column)
+
+    # Same lazy lookup as Token, on the same slots
+    line = Token.line
+    column = Token.column
 
     def as_css(self):
         """
@@ -414,9 +511,9 @@ class FunctionToken(ContainerToken):
     __slots__ = 'function_name',
 
     def __init__(self, type_, css_start, css_end, function_name, content,
-                 line, column):
+                 line=None, column=None, offset=None, lines=None):
         super(FunctionToken, self).__init__(
-            type_, css_start, css_end, content, line, column)
+            type_, css_start, css_end, content, line, column, offset, lines)
         # Remove the ( marker:
         self.function_name = function_name[:-1]
 
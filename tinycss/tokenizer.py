@@ -24,12 +24,11 @@ def tokenize_flat(
         unicode_unescape=token_data.UNICODE_UNESCAPE,
         newline_unescape=token_data.NEWLINE_UNESCAPE,
         simple_unescape=token_data.SIMPLE_UNESCAPE,
-        find_newlines=token_data.FIND_NEWLINES,
+        SourceLines=token_data.SourceLines,
         Token=token_data.Token,
         len=len,
         int=int,
         float=float,
-        list=list,
         _None=None):
     """
     :param css_source:
@@ -43,8 +42,8 @@ def tokenize_flat(
     """
 
     pos = 0
-    line = 1
-    column = 1
+    # Tokens keep their offset; line and column are looked up from it.
+    lines = SourceLines(css_source)
     source_len = len(css_source)
     tokens = []
     while pos < source_len:
@@ -124,19 +123,143 @@ def tokenize_flat(
                 value = unicode_unescape(value)
             else:
                 value = css_value
-            tokens.append(Token(type_, css_value, value, unit, line, column))
+            tokens.append(
+                Token(type_, css_value, value, unit, _None, _None, pos, lines))
 
         pos = next_pos
-        newlines = list(find_newlines(css_value))
-        if newlines:
-            line += len(newlines)
-            # Add 1 to have lines start at column 1, not 0
-            column = length - newlines[-1].end() + 1
+    return tokens
+
+
+def regex_tokenize_flat(
+        css_source, ignore_comments=True,
+        # Make these local variable to avoid global lookups in the loop
+        finditer=token_data.MASTER_TOKEN_REGEXP.finditer,
+        token_types=token_data.MASTER_TOKEN_TYPES,
+        function_group=token_data.MASTER_TOKEN_REGEXP.groupindex['function'],
+        unit_group=token_data.MASTER_TOKEN_REGEXP.groupindex['unit'],
+        percent_group=token_data.MASTER_TOKEN_REGEXP.groupindex['percent'],
+        unicode_unescape=token_data.UNICODE_UNESCAPE,
+        newline_unescape=token_data.NEWLINE_UNESCAPE,
+        simple_unescape=token_data.SIMPLE_UNESCAPE,
+        SourceLines=token_data.SourceLines,
+        Token=token_data.Token,
+        verbatim=frozenset([
+            'S', ':', ';', '{', '}', '(', ')', '[', ']', 'UNICODE-RANGE',
+            'BAD_URI', 'CDO', 'CDC']),
+        names=frozenset(['IDENT', 'ATKEYWORD', 'HASH']),
+        comments=frozenset(['COMMENT', 'BAD_COMMENT']),
+        len=len,
+        int=int,
+        float=float,
+        _None=None):
+    """
+    Same as :func:`python_tokenize_flat`, but all tokens are matched by a
+    single regexp (see MASTER_TOKEN_REGEXP in token_data) instead of trying
+    the regexps for the first character one by one, and values are only
+    unescaped when they contain a backslash.
+
+    Characters no token matches are skipped by the search; each of them is
+    a DELIM.
+
+    :param css_source:
+        CSS as an unicode string
+    :param ignore_comments:
+        if true (the default) comments will not be included in the
+        return value
+    :return:
+        An iterator of :class:`Token`
+
+    """
+
+    pos = 0
+    lines = SourceLines(css_source)
+    source_len = len(css_source)
+    tokens = []
+    for match in finditer(css_source):
+        start = match.start()
+        while pos < start:
+            # No match. See python_tokenize_flat
+            char = css_source[pos]
+            tokens.append(
+                Token('DELIM', char, char, _None, _None, _None, pos, lines))
+            pos += 1
+        group = match.lastindex
+        type_ = token_types[group]
+        css_value = match.group()
+        next_pos = match.end()
+
+        unit = _None
+        if type_ in verbatim:
+            value = css_value
+        elif type_ in names:
+            if type_ == 'IDENT' and match.start(function_group) >= 0:
+                type_ = 'FUNCTION'
+            value = css_value
+            if '\\' in value:
+                value = unicode_unescape(simple_unescape(value))
+        elif type_ in comments:
+            # A BAD_COMMENT is a comment at EOF. Ignore it too.
+            value = _None if ignore_comments else css_value
+        # Parse numbers, extract strings and URIs, unescape
+        elif type_ == 'NUMBER':
+            value = match.group(group + 1)
+            if '.' in value:
+                value = float(value)
+            else:
+                value = int(value)
+                type_ = 'INTEGER'
+            unit = match.group(unit_group)
+            if unit is not _None:
+                type_ = 'DIMENSION'
+                if '\\' in unit:
+                    unit = unicode_unescape(simple_unescape(unit))
+                unit = unit.lower()  # normalize
+            elif match.start(percent_group) >= 0:
+                type_ = 'PERCENTAGE'
+                unit = '%'
+        elif type_ == 'URI':
+            value = match.group(group + 1)
+            if value and value[0] in '"\'':
+                value = value[1:-1]  # Remove quotes
+                if '\\' in value:
+                    value = newline_unescape(value)
+            if '\\' in value:
+                value = unicode_unescape(simple_unescape(value))
+        elif type_ == 'STRING':
+            value = css_value[1:-1]  # Remove quotes
+            if '\\' in value:
+                value = unicode_unescape(simple_unescape(newline_unescape(value)))
+        # See python_tokenize_flat about BAD_STRING
+        elif type_ == 'BAD_STRING' and next_pos == source_len:
+            type_ = 'STRING'
+            value = css_value[1:]  # Remove quote
+            if '\\' in value:
+                value = unicode_unescape(simple_unescape(newline_unescape(value)))
         else:
-            column += length
+            value = css_value
+        if value is not _None:
+            tokens.append(
+                Token(type_, css_value, value, unit, _None, _None, pos, lines))
+
+        pos = next_pos
+    while pos < source_len:
+        char = css_source[pos]
+        tokens.append(
+            Token('DELIM', char, char, _None, _None, _None, pos, lines))
+        pos += 1
     return tokens
 
 
+def _position_args(token):
+    """
+    Line, column, offset and lines arguments for a :class:`ContainerToken`
+    starting where `token` does, without looking the line up yet.
+    """
+    if token._lines is None:
+        return token.line, token.column, token.offset, None
+    return None, None, token.offset, token._lines
+
+
 def regroup(tokens):
     """
     Match pairs of tokens: () [] {} function()
@@ -160,7 +283,8 @@ def regroup(tokens):
 
     def _regroup_inner(stop_at=None, tokens=tokens, pairs=pairs, eof=eof,
                        ContainerToken=token_data.ContainerToken,
-                       FunctionToken=token_data.FunctionToken):
+                       FunctionToken=token_data.FunctionToken,
+                       token_position=_position_args):
         for token in tokens:
             type_ = token.type
             if type_ == stop_at:
@@ -178,11 +302,10 @@ def regroup(tokens):
                 if type_ == 'FUNCTION':
                     yield FunctionToken(token.type, token.as_css(), end,
                                         token.value, content,
-                                        token.line, token.column)
+                                        *token_position(token))
                 else:
                     yield ContainerToken(token.type, token.as_css(), end,
-                                         content,
-                                         token.line, token.column)
+                                         content, *token_position(token))
         else:
             eof[0] = True  # end of file/stylesheet
     return _regroup_inner()
@@ -203,13 +326,19 @@ def tokenize_grouped(css_source, ignore_comments=True):
 
 
 # Optional Cython version of tokenize_flat
-# Make both versions available with explicit names for tests.
+# Make all versions available with explicit names for tests.
 python_tokenize_flat = tokenize_flat
+# Without the speedups, the single regexp version is the faster one
+tokenize_flat = regex_tokenize_flat
 try:
     from . import speedups
 except ImportError:
+    # Not built for this platform, see build_speedups.py
     cython_tokenize_flat = None
 else:
     cython_tokenize_flat = speedups.tokenize_flat
     # Default to the Cython version if available
     tokenize_flat = cython_tokenize_flat
+
+#: Whether the compiled speedups are in use by :func:`tokenize_flat`.
+HAS_SPEEDUPS = cython_tokenize_flat is not None